@@ -1,22 +1,41 @@
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response, abort
 import requests
-from bs4 import BeautifulSoup
+import http_client
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
 import logging
 import smtplib
 import os
-import json
+import re
 import time
 import threading
+import sqlite3
+import base64
+import calendar
 from dotenv import load_dotenv
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlencode
 from collections import defaultdict
 from pytz import timezone
 from logging.handlers import RotatingFileHandler
+from feed_fetcher import FetchJob, FETCH_DEADLINE
+from ingestion import Ingestor, INGEST_ENABLED, SNAPSHOT_WINDOW_SECONDS, DEFAULT_POLL_INTERVAL, load_snapshot, save_snapshot
+from feed_cache import FeedCache
+from config_store import ConfigFile
+from response_cache import ResponseCache
+from article_store import ArticleStore
+from article import Article, to_timestamp
+from feed_parser import parse_feed_entries
+from poll_scheduler import ADAPTIVE_POLLING
+from dates import parse_pub_date, parse_date
+from topic_matcher import get_matcher
+from single_flight import file_lock
+import metrics
+from dates import parse_failures
+from profiling import profile_call, PROFILING_ENABLED, PROFILE_SORT_KEYS, PROFILE_MAX_LINES
+from email_scheduler import send_briefing
 
 # Load environment variables from .env file
 load_dotenv()
@@ -32,50 +51,59 @@ def get_secret(filepath):
 app = Flask(__name__)
 
 NEWS_SOURCES_FILE = "news_sources.json"
-NEWSAPI_URL = "https://newsapi.org/v2/everything"
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")
 TOPICS_FILE = "topics.json"
-CACHE_FILE = "news_cache.json"
+NEWSAPI_FETCH_KEY = "newsapi"
+NEWSAPI_CACHE_SECONDS = 3600
+NEWSAPI_LOCK_TIMEOUT = 30
+DASHBOARD_DATA_FILTERS = ("since", "source", "topic", "limit", "cursor", "format")
+DASHBOARD_DATA_MAX_LIMIT = 1000
+SEARCH_PER_PAGE = 20
+SEARCH_MAX_PER_PAGE = 100
+SEARCH_ORDERS = ("rank", "date")
+BRIEFING_ENABLED = os.getenv("BRIEFING_ENABLED", "1") != "0"
+# Local time (the container's TZ) at which the daily briefing is emailed
+BRIEFING_TIME = os.getenv("BRIEFING_TIME", "13:00")
+GOOGLE_NEWS_RSS_URL = os.getenv("GOOGLE_NEWS_RSS_URL", "https://news.google.com/rss/search")
+GOOGLE_NEWS_INTERVAL = int(os.getenv("GOOGLE_NEWS_INTERVAL", "1800"))
+GOOGLE_NEWS_BATCH_SIZE = int(os.getenv("GOOGLE_NEWS_BATCH_SIZE", "8"))  # 1 disables batching
+GOOGLE_NEWS_MAX_URL_LENGTH = int(os.getenv("GOOGLE_NEWS_MAX_URL_LENGTH", "512"))
+GOOGLE_NEWS_ITEMS_PER_TOPIC = int(os.getenv("GOOGLE_NEWS_ITEMS_PER_TOPIC", "5"))
+# Google News orders results by relevance, not date, so its window filters but never stops parsing early
+GOOGLE_NEWS_LOOKBACK_HOURS = int(os.getenv("GOOGLE_NEWS_LOOKBACK_HOURS", "24"))
+# Defaults for the per-source max_items and lookback_hours keys in news_sources.json
+RSS_MAX_ITEMS = int(os.getenv("RSS_MAX_ITEMS", "20"))
+RSS_LOOKBACK_HOURS = int(os.getenv("RSS_LOOKBACK_HOURS", "24"))
+SOURCE_SETTINGS = ("max_items", "lookback_hours", "poll_interval")
+GOOGLE_NEWS_MAX_ITEMS = 100  # Google News returns at most 100 items per query
+NEWSAPI_INTERVAL = int(os.getenv("NEWSAPI_INTERVAL", "3600"))
 NEWSAPI_KEY = get_secret(os.getenv("NEWSAPI_KEY_FILE"))
 app.secret_key = get_secret(os.getenv('SECRET_KEY_FILE'))  # Needed for flash messages
 app.config['DEBUG'] = False
-
-def load_cache():
-    """Load the cached data from the cache file."""
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r') as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                logging.error("Error decoding JSON in cache file.")
-    return {}
-
-def save_cache(data):
-    """Save the data to the cache file."""
-    with open(CACHE_FILE, 'w') as file:
-        json.dump(data, file, indent=4)
+feed_cache = FeedCache()
+news_sources_config = ConfigFile(NEWS_SOURCES_FILE, default=[])
+# Ensure the structure matches the existing format: [{"topic": name}, ...]
+topics_config = ConfigFile(
+    TOPICS_FILE,
+    load=lambda raw: [topic["topic"] for topic in raw],
+    dump=lambda topics: [{"topic": topic} for topic in topics],
+    default=[],
+)
+article_store = ArticleStore()
+NEWSAPI_LOCK_FILE = f"{article_store.path}.newsapi.lock"
 
 def is_cache_valid():
-    """Check if the cache is valid based on the timestamp."""
-    if not os.path.exists(CACHE_FILE):
-        return False
-
+    """Check if the stored NewsAPI results are fresh enough to reuse."""
     try:
-        with open(CACHE_FILE, 'r') as file:
-            cache_data = json.load(file)
-
-        last_fetched = cache_data.get('last_fetched')
-        if not last_fetched:
-            return False
-
-        # Parse the timestamp using fromisoformat
-        last_fetched_time = datetime.fromisoformat(last_fetched)
-        cache_age = datetime.utcnow() - last_fetched_time
-
-        # Consider cache valid if it's less than 1 hour old
-        return cache_age <= timedelta(hours=1)
-    except (ValueError, KeyError, json.JSONDecodeError) as e:
+        last_fetched = article_store.last_fetched(NEWSAPI_FETCH_KEY)
+    except sqlite3.Error as e:
         logging.error(f"Error checking cache validity: {e}")
         return False
+    if not last_fetched:
+        return False
+
+    # Consider cache valid if it's less than 1 hour old
+    return time.time() - last_fetched <= NEWSAPI_CACHE_SECONDS
 
 @app.template_filter('strftime')
 def _jinja2_filter_datetime(date, fmt=None):
@@ -84,23 +112,23 @@ def _jinja2_filter_datetime(date, fmt=None):
     if fmt:
         return date.strftime(fmt)
     return date.strftime("%Y-%m-%d %H:%M:%S")
+
+@app.template_filter('duration')
+def _jinja2_filter_duration(seconds):
+    """Format a number of seconds as a short human-readable duration."""
+    if seconds is None:
+        return 'unknown'
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{round(seconds / 60)} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
     
 def load_news_sources():
-    """Load news sources from the JSON file."""
-    if not os.path.exists(NEWS_SOURCES_FILE):
-        logging.warning(f"News sources file '{NEWS_SOURCES_FILE}' not found.")
-        return []
-    with open(NEWS_SOURCES_FILE, "r") as file:
-        try:
-            return json.load(file)
-        except json.JSONDecodeError as e:
-            logging.error(f"Error decoding JSON in '{NEWS_SOURCES_FILE}': {e}")
-            return []
-
-def save_news_sources(news_sources):
-    """Save news sources to a JSON file."""
-    with open(NEWS_SOURCES_FILE, 'w') as file:
-        json.dump(news_sources, file, indent=4)
+    """Return the news sources as an immutable snapshot, re-read only when the file changes."""
+    return news_sources_config.snapshot()
 
 # Set up logging
 handler = RotatingFileHandler('app.log', maxBytes=10000, backupCount=3)
@@ -109,69 +137,130 @@ app.logger.addHandler(handler)
 
 # Load topics from a JSON file
 def load_topics_from_json():
-    """Load the list of topics from a JSON file."""
-    try:
-        with open(TOPICS_FILE, 'r') as file:
-            topics = json.load(file)
-        return [topic["topic"] for topic in topics]  # Extract the topic names
-    except FileNotFoundError:
-        logging.warning("topics.json file not found.")
-        return []
-    except json.JSONDecodeError:
-        logging.error("Error reading topics file.")
-        return []
-        
-def save_topics_to_json(topics):
-    """Save the list of topics to a JSON file."""
-    try:
-        # Ensure the structure matches the existing format
-        topics_data = [{"topic": topic} for topic in topics]
-        with open(TOPICS_FILE, 'w') as file:
-            json.dump(topics_data, file, indent=4)
-    except Exception as e:
-        logging.error(f"Error saving topics to {TOPICS_FILE}: {e}")
-
-def fetch_google_news_rss(topic):
-    try:
-        google_news_url = f"https://news.google.com/rss/search?q={topic}&hl=en-US&gl=US&ceid=US:en"
-
-        response = requests.get(google_news_url)
+    """Return the topic names as an immutable snapshot, re-read only when the file changes."""
+    return topics_config.snapshot()
+
+def fetch_feed_entries(url, timeout=None, limit=5, since=None, source=None):
+    """Fetch and stream-parse a feed, reusing the cached parse when the server answers 304.
+
+    At most limit entries are returned. With since (epoch seconds), entries
+    published at or before it are skipped and parsing stops once the feed
+    runs past it; each entry returned then carries its parsed publication
+    time as pub_ts (None if the date could not be parsed). Timings and byte counts are recorded under source, or the
+    URL's host if not given.
+    """
+    label = source or urlparse(url).netloc
+
+    def is_stale(entry):
+        published = parse_pub_date(entry["pub_date"], label)
+        # Kept on the entry, and in the feed cache, so callers do not parse the date again
+        entry["pub_ts"] = to_timestamp(published) if published is not None else None
+        return entry["pub_ts"] is not None and entry["pub_ts"] <= since
+
+    with metrics.FEED_FETCH_SECONDS.time(source=label):
+        response = http_client.get(url, headers=feed_cache.request_headers(url, limit, since), timeout=timeout, stream=True)
+    if response.status_code == 304:
+        response.close()
+        metrics.FEED_NOT_MODIFIED.inc(source=label)
+        entries = feed_cache.not_modified(url)
+        if entries is not None:
+            return entries[:limit]
+        # The entry was evicted in the meantime; fetch the full body again
+        response = http_client.get(url, timeout=timeout, stream=True)
+
+    with response:
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "xml")
-
-        items = soup.find_all("item")
+        response.raw.decode_content = True
+        with metrics.FEED_PARSE_SECONDS.time(source=label):
+            entries = parse_feed_entries(response.raw, limit=limit, is_stale=is_stale if since is not None else None)
+        # tell() counts the bytes read off the wire, which stops short of the end when parsing stops early
+        metrics.FEED_BYTES.inc(response.raw.tell(), source=label)
+    if entries is not None:
+        feed_cache.store(url, response, entries, limit, since)
+    return entries
+
+def google_news_query(topics):
+    """Combine topics into one Google News OR-query, quoting multi-word topics."""
+    return " OR ".join(f'"{topic}"' if " " in topic else topic for topic in topics)
+
+def google_news_url(topics):
+    """Build the Google News RSS search URL for one topic or a batch of topics."""
+    if isinstance(topics, str):
+        topics = [topics]
+    params = {"q": google_news_query(topics), "hl": "en-US", "gl": "US", "ceid": "US:en"}
+    return f"{GOOGLE_NEWS_RSS_URL}?{urlencode(params)}"
+
+def batch_google_news_topics(topics):
+    """Pack topics into as few OR-queries as the URL length and batch size allow."""
+    batches = []
+    batch = []
+    for topic in topics:
+        candidate = batch + [topic]
+        if batch and (len(candidate) > GOOGLE_NEWS_BATCH_SIZE
+                      or len(google_news_url(candidate)) > GOOGLE_NEWS_MAX_URL_LENGTH):
+            batches.append(batch)
+            candidate = [topic]
+        batch = candidate
+    if batch:
+        batches.append(batch)
+    return batches
+
+def fetch_google_news_rss(topics):
+    """Fetch Google News for one topic or a batch of topics.
+
+    Articles are attributed back to the batch's topics with the topic
+    matcher; those that match none of them are filed under "General".
+    Each topic keeps at most GOOGLE_NEWS_ITEMS_PER_TOPIC articles.
+    """
+    if isinstance(topics, str):
+        topics = [topics]
+    try:
+        entries = fetch_feed_entries(google_news_url(topics), limit=GOOGLE_NEWS_MAX_ITEMS, source="Google News") or []
+        matcher = get_matcher(topics)
+        per_topic = defaultdict(int)
         news_items = []
-        for item in items[:5]:
-            title = item.find("title")
-            link = item.find("link")
-            pub_date = item.find("pubDate")
-
-            if title and link:
-                article_pub_date = pub_date.get_text().strip() if pub_date else datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-                article_datetime = datetime.strptime(article_pub_date, '%a, %d %b %Y %H:%M:%S %Z')
-                
-                # Only add articles from the last 24 hours
-                if article_datetime > datetime.utcnow() - timedelta(days=1):
-                    news_items.append({
-                        "title": title.get_text().strip(),
-                        "link": link.get_text().strip(),
-                        "pub_date": article_pub_date,
-                        "source": "Google News",
-                        "topic": topic
-                    })
-        logging.info(f"Fetched {len(news_items)} articles from Google News for topic: {topic}")
+        cutoff = datetime.utcnow() - timedelta(hours=GOOGLE_NEWS_LOOKBACK_HOURS)
+        for entry in entries:
+            article_datetime = parse_pub_date(entry["pub_date"], "Google News")
+
+            # Only add articles from the lookback window
+            if not article_datetime or article_datetime <= cutoff:
+                continue
+            topic = matcher.classify(entry["title"]) if len(topics) > 1 else topics[0]
+            if per_topic[topic] >= GOOGLE_NEWS_ITEMS_PER_TOPIC:
+                continue
+            per_topic[topic] += 1
+            news_items.append(Article(entry["title"], entry["link"], to_timestamp(article_datetime), "Google News", topic))
+        logging.info(f"Fetched {len(news_items)} articles from Google News for topics: {', '.join(topics)}")
+        metrics.FEED_ITEMS.inc(len(news_items), source="Google News")
         return news_items
     except Exception as e:
         logging.error(f"Error fetching Google News RSS feed: {str(e)}")
+        metrics.FEED_ERRORS.inc(source="Google News")
         return []
 
+def stored_newsapi_articles():
+    """Return the NewsAPI articles from the last day kept in the article store."""
+    return article_store.recent(since=time.time() - 86400, origin="newsapi")
+
 def fetch_newsapi_articles():
-    """Fetch cybersecurity news from NewsAPI and cache the results."""
+    """Return fresh NewsAPI articles, calling the API at most once per cache period across workers."""
     if is_cache_valid():
-        logging.info("Using cached NewsAPI data.")
-        cache = load_cache()
-        return cache.get('articles', [])
-
+        logging.info("Using stored NewsAPI data.")
+        return stored_newsapi_articles()
+
+    # Only the lock holder calls NewsAPI; the other workers wait and reuse what it stored
+    with file_lock(NEWSAPI_LOCK_FILE, timeout=NEWSAPI_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logging.warning("Timed out waiting for another worker's NewsAPI fetch; using stored data.")
+            return stored_newsapi_articles()
+        if is_cache_valid():
+            logging.info("Using NewsAPI data stored by another worker.")
+            return stored_newsapi_articles()
+        return refresh_newsapi_articles()
+
+def refresh_newsapi_articles():
+    """Fetch cybersecurity news from NewsAPI and store the results."""
     logging.info("Fetching new data from NewsAPI.")
     topics = load_topics_from_json()
     if not topics:
@@ -189,7 +278,9 @@ def fetch_newsapi_articles():
     }
 
     try:
-        response = requests.get(NEWSAPI_URL, params=params)
+        with metrics.FEED_FETCH_SECONDS.time(source="NewsAPI"):
+            response = http_client.get(NEWSAPI_URL, params=params)
+        metrics.FEED_BYTES.inc(len(response.content), source="NewsAPI")
         response.raise_for_status()
         json_response = response.json()
 
@@ -199,137 +290,176 @@ def fetch_newsapi_articles():
             return []
 
         articles = json_response.get('articles', [])
-        formatted_articles = [
-            {
-                "title": article.get("title"),
-                "link": article.get("url"),
-                "pub_date": article.get("publishedAt"),
-                "source": "NewsAPI",
-                "last_updated": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            for article in articles
-            if article.get("title") and article.get("url")
-            and article.get("publishedAt")
-            and datetime.strptime(article.get("publishedAt"), '%Y-%m-%dT%H:%M:%SZ') > datetime.utcnow() - timedelta(days=1)
-        ]
-
-        # Save the fetched data into cache
-        cache_data = {
-            'last_fetched': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-            'articles': formatted_articles
-        }
-        save_cache(cache_data)
+        cutoff = datetime.utcnow() - timedelta(days=1)
+        # Classify the titles like RSS items, so topic digests include NewsAPI articles
+        matcher = get_matcher(topics)
+        formatted_articles = []
+        for article in articles:
+            if not article.get("title") or not article.get("url"):
+                continue
+            published = parse_pub_date(article.get("publishedAt"), "NewsAPI")
+            if published and published > cutoff:
+                formatted_articles.append(Article(article["title"], article["url"], to_timestamp(published), "NewsAPI",
+                                                  matcher.classify(article["title"])))
+
+        # Save the fetched data into the article store
+        article_store.add_articles(formatted_articles, "newsapi")
+        article_store.mark_fetched(NEWSAPI_FETCH_KEY)
         logging.info(f"Fetched {len(formatted_articles)} articles from NewsAPI")
+        metrics.FEED_ITEMS.inc(len(formatted_articles), source="NewsAPI")
         return formatted_articles
 
     except requests.exceptions.RequestException as e:
         logging.error(f"Error fetching news from NewsAPI: {str(e)}")
+        metrics.FEED_ERRORS.inc(source="NewsAPI")
         return []
 
     except (ValueError, KeyError) as e:
         logging.error(f"Error processing NewsAPI response: {str(e)}")
+        metrics.FEED_ERRORS.inc(source="NewsAPI")
         return []
 
 def is_valid_rss_url(url):
     """Check if the provided URL is a valid RSS feed."""
     try:
-        response = requests.get(url, timeout=5)
-        soup = BeautifulSoup(response.content, "xml")
-        if soup.find("rss") or soup.find("feed"):
-            return True
-        return False
+        return fetch_feed_entries(url, timeout=(5, 5)) is not None
     except Exception as e:
         logging.error(f"Error checking RSS URL: {e}")
         return False
 
-from collections import defaultdict
-
-def fetch_cybersecurity_news():
-    """Fetches cybersecurity news from multiple RSS feeds."""
-    news_items = defaultdict(lambda: defaultdict(list))  # Group by source and then by topic
-    topics = load_topics_from_json()  # Get predefined topics
+def source_setting(source, key, default):
+    """Return a per-source setting from news_sources.json as a positive int, or default."""
+    value = source.get(key)
+    if value in (None, ""):
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        logging.warning(f"Ignoring invalid {key} {value!r} for {source.get('name')}")
+        return default
+    return value if value > 0 else default
+
+def fetch_rss_source(source, topics):
+    """Fetch cybersecurity news from a single RSS/Atom feed.
+
+    Only the newest max_items entries published within the source's
+    lookback_hours are kept; the feed is not parsed past that window.
+    """
+    news_items = []
+    url = source.get("url")
+    name = source.get("name", "Unknown Source")
+    max_items = source_setting(source, "max_items", RSS_MAX_ITEMS)
+    since = int(time.time()) - source_setting(source, "lookback_hours", RSS_LOOKBACK_HOURS) * 3600
 
-    news_sources = load_news_sources()
-    logging.info(f"Attempting to fetch news from {len(news_sources)} sources")
+    try:
+        logging.info(f"Fetching news from {name}: {url}")
+        entries = fetch_feed_entries(url, limit=max_items, since=since, source=name)
+        if entries is None:
+            logging.warning(f"{name} did not return an RSS or Atom feed")
+            metrics.FEED_ERRORS.inc(source=name)
+            return news_items
+        logging.info(f"Found {len(entries)} items for {name}")
+
+        matcher = get_matcher(topics)
+        for entry in entries:
+            title_text = entry["title"]
+
+            # Skip entries without a usable date rather than guessing one
+            pub_ts = entry["pub_ts"]
+            if pub_ts is None:
+                logging.warning(f"Could not parse publication date {entry['pub_date']!r} for item in {name}")
+                continue
+
+            # Entries replayed from the feed cache on a 304 may have aged out of the window
+            if pub_ts > since:
+                news_items.append(Article(title_text, entry["link"], pub_ts, name, matcher.classify(title_text)))
 
-    for source in news_sources:
-        url = source.get("url")
-        name = source.get("name", "Unknown Source")
-        
-        try:
-            logging.info(f"Fetching news from {name}: {url}")
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            # Try parsing as XML first
-            soup = BeautifulSoup(response.content, "xml")
-            
-            # Look for items in different XML structures
-            items = soup.find_all("item") or soup.find_all("entry")
-            logging.info(f"Found {len(items)} items for {name}")
-
-            for item in items[:5]:  # Limit to 5 items per source
-                # Extract title
-                title = item.find("title")
-                if not title:
-                    logging.warning(f"No title found in item for {name}")
-                    continue
-                title_text = title.get_text().strip()
-
-                # Extract link
-                link = item.find("link")
-                if not link:
-                    logging.warning(f"No link found for item in {name}")
-                    continue
-                
-                # Handle different link formats
-                if link.get_text():
-                    link_url = link.get_text().strip()
-                elif link.get("href"):
-                    link_url = link.get("href")
-                else:
-                    logging.warning(f"Could not extract link for item in {name}")
-                    continue
-
-                # Extract publication date
-                pub_date = item.find("pubDate") or item.find("published")
-                if pub_date:
-                    pub_date_str = pub_date.get_text().strip()
-                    try:
-                        pub_date_obj = datetime.strptime(pub_date_str, "%a, %d %b %Y %H:%M:%S %Z")
-                    except ValueError:
-                        try:
-                            # Try alternative date formats
-                            pub_date_obj = datetime.strptime(pub_date_str, "%Y-%m-%dT%H:%M:%S%z")
-                        except ValueError:
-                            pub_date_obj = datetime.utcnow()
-                else:
-                    pub_date_obj = datetime.utcnow()
-
-                # Only include articles from the last 24 hours
-                if datetime.utcnow() - pub_date_obj < timedelta(days=1):
-                    # Determine topic
-                    article_topic = "General"
-                    for topic in topics:
-                        if topic.lower() in title_text.lower():
-                            article_topic = topic
-                            break
-                    
-                    news_items[name][article_topic].append({
-                        "title": title_text,
-                        "link": link_url,
-                        "pub_date": pub_date_obj.strftime('%Y-%m-%d %H:%M:%S'),
-                        "source": name,
-                        "topic": article_topic
-                    })
-
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching news from {name} ({url}): {str(e)}")
-        except Exception as e:
-            logging.error(f"Unexpected error processing {name}: {str(e)}")
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Error fetching news from {name} ({url}): {str(e)}")
+        metrics.FEED_ERRORS.inc(source=name)
+    except Exception as e:
+        logging.error(f"Unexpected error processing {name}: {str(e)}")
+        metrics.FEED_ERRORS.inc(source=name)
 
+    metrics.FEED_ITEMS.inc(len(news_items), source=name)
     return news_items
 
+def build_fetch_jobs(news_sources, topics):
+    """Build one fetch job per RSS source, per batch of Google News topics and for NewsAPI."""
+    jobs = [
+        FetchJob(f"rss:{source['url']}", source["url"], fetch_rss_source, source, topics,
+                 interval=source_setting(source, "poll_interval", None), origin="rss",
+                 lookback=source_setting(source, "lookback_hours", RSS_LOOKBACK_HOURS) * 3600)
+        for source in news_sources
+        if source.get("url")
+    ]
+    jobs += [
+        FetchJob(f"google:{google_news_query(batch)}", google_news_url(batch), fetch_google_news_rss, batch,
+                 interval=GOOGLE_NEWS_INTERVAL, origin="google", lookback=GOOGLE_NEWS_LOOKBACK_HOURS * 3600)
+        for batch in batch_google_news_topics(topics)
+    ]
+    jobs.append(FetchJob("newsapi", NEWSAPI_URL, fetch_newsapi_articles,
+                         interval=NEWSAPI_INTERVAL, origin="newsapi"))
+    return jobs
+
+def build_ingest_jobs():
+    """Build the fetch jobs for the background ingestor from the current config."""
+    return build_fetch_jobs(load_news_sources(), load_topics_from_json())
+
+ingestor = Ingestor(build_ingest_jobs, article_store)
+ingestor.add_listener(lambda snapshot: feed_cache.save())
+response_cache = ResponseCache()
+ingestor.add_listener(lambda snapshot: response_cache.invalidate())
+ingestor.add_listener(save_snapshot)
+# A restarted worker serves the last saved snapshot while background ingestion refreshes it;
+# without background ingestion nothing would refresh it, so it is only used when ingestion runs
+if INGEST_ENABLED:
+    saved_snapshot = load_snapshot()
+    if saved_snapshot is not None:
+        ingestor.warm_start(saved_snapshot)
+
+def _cache_lookups():
+    lookups = {}
+    for name, stats in (("feed", feed_cache.stats()), ("response", response_cache.stats())):
+        lookups[(name, "hit")] = stats["hits"]
+        lookups[(name, "miss")] = stats["misses"]
+    return lookups
+
+metrics.Gauge("cache_lookups_total", "Feed cache (304) and rendered-response cache lookups.",
+              _cache_lookups, labels=["cache", "result"], kind="counter")
+metrics.Gauge("cache_hit_ratio", "Share of lookups answered from the cache.",
+              lambda: {("feed",): feed_cache.stats()["hit_rate"], ("response",): response_cache.stats()["hit_rate"]},
+              labels=["cache"])
+metrics.Gauge("snapshot_articles", "Articles in the published snapshot.",
+              lambda: len(ingestor.snapshot().articles))
+metrics.Gauge("snapshot_version", "Version of the published snapshot; saved snapshots carry it across restarts.",
+              lambda: ingestor.snapshot().version)
+metrics.Gauge("snapshot_age_seconds", "Seconds since the snapshot was published.",
+              lambda: (datetime.utcnow() - ingestor.snapshot().built_at).total_seconds() if ingestor.snapshot().built_at else -1)
+metrics.Gauge("circuit_open", "1 for hosts whose circuit breaker is open or half-open.",
+              lambda: {(state["host"],): int(state["state"] != "closed") for state in http_client.breaker.states()},
+              labels=["host"])
+metrics.Gauge("pub_date_parse_failures_total", "Articles whose publication date could not be parsed.",
+              lambda: {(source,): count for source, count in parse_failures().items()},
+              labels=["source"], kind="counter")
+
+def send_daily_briefing():
+    """Email the daily briefing straight from the current article snapshot."""
+    if not ingestor.wait_ready(timeout=FETCH_DEADLINE + 5):
+        logging.error("No article snapshot is ready; skipping the daily briefing.")
+        return
+    send_briefing(ingestor.snapshot().articles, article_store)
+
+scheduler = BackgroundScheduler(daemon=True)
+if INGEST_ENABLED:
+    scheduler.add_job(article_store.prune, "interval", hours=24, id="prune_articles")
+    if BRIEFING_ENABLED:
+        briefing_hour, briefing_minute = BRIEFING_TIME.split(":")
+        scheduler.add_job(send_daily_briefing, "cron", hour=int(briefing_hour), minute=int(briefing_minute),
+                          id="daily_briefing", max_instances=1, coalesce=True, misfire_grace_time=3600)
+    ingestor.start(scheduler)
+    atexit.register(lambda: scheduler.shutdown(wait=False))
+
 
 # Add routes for managing topics
 @app.route('/add_topic', methods=['POST'])
@@ -337,10 +467,12 @@ def add_topic():
     """Add a new topic to the JSON file."""
     topic = request.form.get('topic')
     if topic:
-        topics = load_topics_from_json()
-        if topic not in topics:  # Prevent duplicates
+        def add(topics):
+            if topic in topics:  # Prevent duplicates
+                return False
             topics.append(topic)
-            save_topics_to_json(topics)
+
+        if topics_config.update(add) is not False:
             flash(f"Topic '{topic}' added successfully.", "success")
         else:
             flash(f"Topic '{topic}' already exists.", "warning")
@@ -359,9 +491,15 @@ def edit_topic(index):
     if request.method == "POST":
         topic = request.form.get("topic")
         if topic:
-            topics[index] = topic
-            save_topics_to_json(topics)
-            flash("Topic updated successfully.", "success")
+            def edit(topics):
+                if index >= len(topics):
+                    return False
+                topics[index] = topic
+
+            if topics_config.update(edit) is not False:
+                flash("Topic updated successfully.", "success")
+            else:
+                flash("Invalid topic index.", "error")
             return redirect(url_for("dashboard"))
         else:
             flash("Topic cannot be empty.", "error")
@@ -371,10 +509,12 @@ def edit_topic(index):
 @app.route('/delete_topic/<topic>', methods=['POST'])
 def delete_topic(topic):
     """Delete a topic."""
-    topics = load_topics_from_json()
-    if topic in topics:
+    def delete(topics):
+        if topic not in topics:
+            return False
         topics.remove(topic)
-        save_topics_to_json(topics)
+
+    if topics_config.update(delete) is not False:
         flash(f"Topic '{topic}' deleted successfully.", "success")
     else:
         flash(f"Topic '{topic}' not found.", "error")
@@ -382,67 +522,49 @@ def delete_topic(topic):
     
 @app.route('/add_source', methods=['POST'])
 def add_source():
-    news_sources = load_news_sources()
     name = request.form['name']
     url = request.form['url']
-    news_sources.append({'name': name, 'url': url})
-    save_news_sources(news_sources)
+    news_sources_config.update(lambda news_sources: news_sources.append({'name': name, 'url': url}))
     return jsonify({'message': 'Source added!'})
 
+def get_dashboard_snapshot():
+    """Return the latest snapshot of merged RSS, NewsAPI, and Google News articles."""
+    if not INGEST_ENABLED:
+        # Without background polling each request fetches the feeds that are due; concurrent
+        # requests share one ingestion run, and one with nothing due reuses the last snapshot
+        return ingestor.refresh()
+    if not ingestor.wait_ready(timeout=0):
+        # The first background run is still in flight; wait for it rather than fetching twice
+        ingestor.wait_ready(timeout=FETCH_DEADLINE + 5)
+    return ingestor.snapshot()
+
 def get_dashboard_data():
-    """Fetch and combine data from RSS, NewsAPI, and Google News RSS sources."""
-    rss_news = fetch_cybersecurity_news()  # Existing RSS sources
-    newsapi_articles = fetch_newsapi_articles()  # Existing NewsAPI sources
-    google_news_articles = []  # New Google News source
-    topics = load_topics_from_json()
-    
-    for topic in topics:
-        google_news_articles += fetch_google_news_rss(topic)
-        
-    # Combine all sources
-    all_news = []
-    for source_dict in rss_news.values():
-        for topic_list in source_dict.values():
-            all_news.extend(topic_list)
-    
-    all_news.extend(newsapi_articles)
-    all_news.extend(google_news_articles)
-    
-    # Log the number of articles found
-    logging.info(f"Total articles found: {len(all_news)}")
-    
-    # Sort by publication date (descending)
-    all_news.sort(key=lambda x: x.get("pub_date", ""), reverse=True)
-    
-    return all_news
+    """Return the merged RSS, NewsAPI, and Google News articles from the latest snapshot."""
+    return get_dashboard_snapshot().articles
 
 @app.route('/stop_alerts/<int:index>', methods=['POST'])
 def stop_alerts(index):
-    news_sources = load_news_sources()
-    
-    if index < len(news_sources):
+    def disable_alerts(news_sources):
+        if index >= len(news_sources):
+            return False
         # Update the source to stop alerts or mark it as inactive
         news_sources[index]['alerts_enabled'] = False
-        save_news_sources(news_sources)
+
+    if news_sources_config.update(disable_alerts) is not False:
         flash("Alerts stopped for this source.", "success")
     else:
         flash("Invalid news source index.", "error")
     
     return redirect(url_for("dashboard"))
 
-@app.route("/")
-def dashboard():
-    """Display the dashboard with all fetched news."""
-    # Fetch news data from multiple sources
-    all_news = get_dashboard_data()
-    
-    # Group news by source and topic
-    grouped_news = defaultdict(lambda: defaultdict(list))
-    for news_item in all_news:
-        source = news_item.get("source", "Unknown Source")
-        topic = news_item.get("topic", "General")
-        grouped_news[source][topic].append(news_item)
-    
+def response_cache_key(snapshot):
+    """Key for a page rendered from snapshot: changes with the snapshot or either config file."""
+    load_topics_from_json()
+    load_news_sources()
+    return (snapshot.version, topics_config.version, news_sources_config.version)
+
+def render_dashboard(snapshot):
+    """Render dashboard.html for the given snapshot."""
     # Get list of topics for the template
     topics = load_topics_from_json()
     
@@ -450,16 +572,181 @@ def dashboard():
     news_sources = load_news_sources()
     
     return render_template("dashboard.html", 
-                            news_items=all_news, 
-                            grouped_news=grouped_news,
+                            news_items=snapshot.articles, 
+                            grouped_news=snapshot.index.grouped(),
+                            article_index=snapshot.index,
                             topics=topics,
                             news_sources=news_sources)
 
+@app.route("/")
+def dashboard():
+    """Display the dashboard with all fetched news."""
+    # Fetch news data from multiple sources
+    snapshot = get_dashboard_snapshot()
+
+    # Pages carrying flash messages are one-off and must not be cached
+    if session.get("_flashes"):
+        return render_dashboard(snapshot)
+    return response_cache.respond("dashboard", response_cache_key(snapshot),
+                                  lambda: render_dashboard(snapshot), "text/html")
+
+def encode_cursor(position):
+    """Encode a (pub_ts, id) store position as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(f"{position[0]}:{position[1]}".encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor back into a (pub_ts, id) store position."""
+    try:
+        pub_ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(pub_ts), int(row_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor.")
+
+def parse_timestamp(value, name="since"):
+    """Parse a date parameter given as epoch seconds or an ISO 8601 / RFC 822 date."""
+    if value.isdigit():
+        return int(value)
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid {name} value: {value!r}")
+    return calendar.timegm(parsed.timetuple())
+
+def parse_count(value, name):
+    """Parse a whole-number parameter such as limit or page."""
+    if not str(value).isdigit():
+        raise ValueError(f"Invalid {name} value: {value!r}")
+    return int(value)
+
 @app.route('/dashboard_data')
 def dashboard_data():
-    """Return dashboard data as JSON."""
-    all_news = get_dashboard_data()
-    return jsonify(all_news)
+    """Return dashboard data as JSON.
+
+    Without query parameters this is the cached snapshot. With any of
+    since, source, topic, limit or cursor it reads the article store
+    directly, newest first. The cursor for the next page is sent in the
+    X-Next-Cursor header. With format=ndjson articles are streamed one JSON
+    object per line as they are read, and a final {"next_cursor": ...} line
+    is emitted if the limit cut the results short.
+    """
+    args = request.args
+    if not any(name in args for name in DASHBOARD_DATA_FILTERS):
+        snapshot = get_dashboard_snapshot()
+        return response_cache.respond("dashboard_data", response_cache_key(snapshot),
+                                      lambda: app.json.dumps([article.to_dict() for article in snapshot.articles]),
+                                      "application/json")
+
+    try:
+        since = parse_timestamp(args["since"]) if "since" in args else time.time() - SNAPSHOT_WINDOW_SECONDS
+        after = decode_cursor(args["cursor"]) if "cursor" in args else None
+        limit = parse_count(args["limit"], "limit") if "limit" in args else None
+        if limit is not None and not 1 <= limit <= DASHBOARD_DATA_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {DASHBOARD_DATA_MAX_LIMIT}.")
+        output_format = args.get("format", "json")
+        if output_format not in ("json", "ndjson"):
+            raise ValueError("format must be json or ndjson.")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The store keeps one copy of each story, so pages never repeat one another's articles
+    rows = article_store.iter_articles(since, source=args.get("source"), topic=args.get("topic"), after=after)
+
+    if output_format == "ndjson":
+        def generate():
+            last_position = None
+            for count, (position, article) in enumerate(rows):
+                if limit is not None and count >= limit:
+                    yield app.json.dumps({"next_cursor": encode_cursor(last_position)}) + "\n"
+                    break
+                last_position = position
+                yield app.json.dumps(article.to_dict()) + "\n"
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    articles = []
+    last_position = None
+    next_cursor = None
+    for position, article in rows:
+        if limit is not None and len(articles) >= limit:
+            next_cursor = encode_cursor(last_position)
+            break
+        articles.append(article.to_dict())
+        last_position = position
+    response = jsonify(articles)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def parse_search_args(args):
+    """Validate search parameters into (page, per_page, ArticleStore.search keyword arguments).
+
+    since and until accept the same formats as /dashboard_data; an until
+    given as a bare YYYY-MM-DD date includes that whole day.
+    """
+    since = parse_timestamp(args["since"], "since") if args.get("since") else None
+    until = None
+    if args.get("until"):
+        until = parse_timestamp(args["until"], "until")
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", args["until"]):
+            until += 86400
+    page = parse_count(args.get("page", 1), "page")
+    if page < 1:
+        raise ValueError("page must be 1 or more.")
+    per_page = parse_count(args.get("per_page", SEARCH_PER_PAGE), "per_page")
+    if not 1 <= per_page <= SEARCH_MAX_PER_PAGE:
+        raise ValueError(f"per_page must be between 1 and {SEARCH_MAX_PER_PAGE}.")
+    order = args.get("order", "rank")
+    if order not in SEARCH_ORDERS:
+        raise ValueError(f"order must be one of {', '.join(SEARCH_ORDERS)}.")
+    options = {
+        "since": since,
+        "until": until,
+        "source": args.get("source") or None,
+        "topic": args.get("topic") or None,
+        "order": order,
+        "limit": per_page,
+        "offset": (page - 1) * per_page,
+    }
+    return page, per_page, options
+
+@app.route('/search')
+def search():
+    """Search the article archive and render the results page."""
+    query = request.args.get("q", "").strip()
+    total, results, error = 0, [], None
+    page, per_page = 1, SEARCH_PER_PAGE
+    if query:
+        try:
+            page, per_page, options = parse_search_args(request.args)
+            total, results = article_store.search(query, **options)
+        except ValueError as e:
+            error = str(e)
+    pages = (total + per_page - 1) // per_page
+    return render_template("search.html", query=query, results=results, total=total, page=page, pages=pages,
+                           error=error, args=request.args, news_sources=load_news_sources(),
+                           topics=load_topics_from_json())
+
+@app.route('/api/search')
+def api_search():
+    """Search the article archive and return one page of ranked results as JSON.
+
+    q is required. Optional parameters are since, until, source, topic,
+    order (rank or date), page and per_page.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q is required."}), 400
+    try:
+        page, per_page, options = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    total, results = article_store.search(query, **options)
+    return jsonify({
+        "query": query,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_page": page + 1 if page * per_page < total else None,
+        "results": [dict(article.to_dict(), score=score) for article, score in results],
+    })
 
 @app.route('/add_news_source', methods=['POST'])
 def add_news_source():
@@ -477,14 +764,8 @@ def add_news_source():
         flash("Invalid RSS feed URL.", "error")
         return redirect(url_for('dashboard'))
 
-    # Load the current news sources from the file
-    news_sources = load_news_sources()
-
-    # Add the new source
-    news_sources.append({"name": name, "url": url})
-
-    # Save the updated list back to the JSON file
-    save_news_sources(news_sources)
+    # Add the new source and save the updated list back to the JSON file
+    news_sources_config.update(lambda news_sources: news_sources.append({"name": name, "url": url}))
 
     # Flash success message and redirect to the dashboard
     flash("News source added successfully.", "success")
@@ -506,22 +787,44 @@ def edit_news_source(index):
             flash("Both name and URL are required.", "error")
             return redirect(url_for("edit_news_source", index=index))
 
-        news_sources[index]["name"] = name
-        news_sources[index]["url"] = url
-        save_news_sources(news_sources)
+        # Blank settings fall back to the defaults
+        settings = {}
+        for key in SOURCE_SETTINGS:
+            value = request.form.get(key, "").strip()
+            if value and not (value.isdigit() and int(value) > 0):
+                flash(f"{key} must be a positive whole number.", "error")
+                return redirect(url_for("edit_news_source", index=index))
+            settings[key] = int(value) if value else None
+
+        def edit(news_sources):
+            if index >= len(news_sources):
+                return False
+            news_sources[index]["name"] = name
+            news_sources[index]["url"] = url
+            for key, value in settings.items():
+                if value is None:
+                    news_sources[index].pop(key, None)
+                else:
+                    news_sources[index][key] = value
 
-        flash("News source updated successfully.", "success")
+        if news_sources_config.update(edit) is not False:
+            flash("News source updated successfully.", "success")
+        else:
+            flash("Invalid news source index.", "error")
         return redirect(url_for("dashboard"))
 
-    return render_template("edit_news_source.html", source=news_sources[index], index=index)
+    return render_template("edit_news_source.html", source=news_sources[index], index=index,
+                           defaults={"max_items": RSS_MAX_ITEMS, "lookback_hours": RSS_LOOKBACK_HOURS,
+                                     "poll_interval": "adaptive" if ADAPTIVE_POLLING else DEFAULT_POLL_INTERVAL})
 
 @app.route("/delete_news_source/<int:index>", methods=["POST"])
 def delete_news_source(index):
-    news_sources = load_news_sources()
-
-    if index < len(news_sources):
+    def delete(news_sources):
+        if index >= len(news_sources):
+            return False
         news_sources.pop(index)
-        save_news_sources(news_sources)
+
+    if news_sources_config.update(delete) is not False:
         flash("News source deleted successfully.", "success")
     else:
         flash("Invalid news source index.", "error")
@@ -532,11 +835,35 @@ def delete_news_source(index):
 @app.route("/google_news", methods=["GET"])
 def google_news():
     topics = load_topics_from_json()
-    news_data = {}
-    for topic in topics:
-        news_data[topic] = fetch_google_news_rss(topic)  # Pass the topic to the function
+    news_data = {topic: [] for topic in topics}
+    news_data.update(get_dashboard_snapshot().index.grouped("Google News"))
     return render_template("google_news.html", news_data=news_data)
     
+@app.route("/metrics")
+def metrics_endpoint():
+    """Expose ingestion and cache metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/debug/profile")
+def profile_ingest():
+    """Profile one forced ingestion run, the work behind a cold get_dashboard_data call.
+
+    Only available when PROFILING_ENABLED=1. ?sort= picks the pstats sort
+    key and ?lines= how many functions to list.
+    """
+    if not PROFILING_ENABLED:
+        abort(404)
+    sort = request.args.get("sort", "cumulative")
+    if sort not in PROFILE_SORT_KEYS:
+        return jsonify({"error": f"sort must be one of {', '.join(PROFILE_SORT_KEYS)}."}), 400
+    try:
+        lines = min(int(request.args.get("lines", "40")), PROFILE_MAX_LINES)
+    except ValueError:
+        return jsonify({"error": "lines must be a number."}), 400
+
+    _, report = profile_call(lambda: ingestor.run_due(force=True), sort=sort, lines=lines)
+    return Response(report, mimetype="text/plain")
+
 @app.route("/management")
 def management_page():
     """Render the management page for topics and news sources."""
@@ -545,10 +872,17 @@ def management_page():
     
     # Load news sources
     news_sources = load_news_sources()
+
+    # Current poll interval and publish-rate stats, by source URL
+    states = ingestor.poll_states()
+    poll_states = {source["url"]: states.get(f"rss:{source['url']}") for source in news_sources}
     
     return render_template("management.html", 
                             topics=topics, 
-                            news_sources=news_sources)
+                            news_sources=news_sources,
+                            poll_states=poll_states,
+                            adaptive_polling=ADAPTIVE_POLLING,
+                            breaker_states=http_client.breaker.states())
 
 if __name__ == "__main__":
     # Configure logging to show more details
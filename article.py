@@ -0,0 +1,60 @@
+"""Compact article record passed between the fetchers, the store, snapshots and the API."""
+import calendar
+import sys
+from datetime import datetime
+
+from dates import parse_pub_date
+
+UNKNOWN_SOURCE = "Unknown Source"
+# pub_date as served by the API and shown on pages: UTC, ISO 8601
+PUB_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def to_timestamp(published):
+    """Convert a naive UTC datetime from parse_pub_date to epoch seconds."""
+    return calendar.timegm(published.timetuple())
+
+
+class Article:
+    """One article, with its publication time as integer epoch seconds.
+
+    Uses __slots__ instead of a per-article dict, and interns source and
+    topic names, which repeat across thousands of articles. Sorting on
+    pub_ts is an integer comparison whatever date format the feed used.
+    Convert to the JSON shape with to_dict() only when responding.
+    """
+
+    __slots__ = ("title", "link", "pub_ts", "source", "topic")
+
+    def __init__(self, title, link, pub_ts, source=UNKNOWN_SOURCE, topic=None):
+        self.title = title
+        self.link = link
+        self.pub_ts = int(pub_ts)
+        self.source = sys.intern(source or UNKNOWN_SOURCE)
+        self.topic = sys.intern(topic) if topic else None
+
+    @property
+    def pub_date(self):
+        return datetime.utcfromtimestamp(self.pub_ts).strftime(PUB_DATE_FORMAT)
+
+    def to_dict(self):
+        """Return the article in the JSON shape served by the API."""
+        return {
+            "title": self.title,
+            "link": self.link,
+            "pub_date": self.pub_date,
+            "source": self.source,
+            "topic": self.topic,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an article from its JSON shape, or return None if its pub_date cannot be parsed."""
+        published = parse_pub_date(data.get("pub_date"), data.get("source"))
+        if published is None:
+            return None
+        return cls(data.get("title") or "", data.get("link") or "", to_timestamp(published),
+                   data.get("source"), data.get("topic"))
+
+    def __repr__(self):
+        return f"Article({self.title!r}, {self.source!r}, {self.pub_date})"
@@ -0,0 +1,83 @@
+"""Source -> topic index of the snapshot's articles, kept newest first with running counts."""
+from bisect import bisect_right
+
+from article import UNKNOWN_SOURCE
+from topic_matcher import DEFAULT_TOPIC
+
+
+class _Bucket:
+    """Articles for one (source, topic) pair, ordered newest first."""
+
+    __slots__ = ("keys", "articles")
+
+    def __init__(self):
+        self.keys = []
+        self.articles = []
+
+    def insert(self, article, pub_ts):
+        # Keys are negated timestamps so the ascending bisect order is newest first;
+        # bisect_right keeps articles with equal timestamps in insertion order
+        position = bisect_right(self.keys, -pub_ts)
+        self.keys.insert(position, -pub_ts)
+        self.articles.insert(position, article)
+
+
+class ArticleIndex:
+    """Groups articles by source and topic as they are added.
+
+    The ingestor builds one index per published snapshot, so request
+    handlers read ready-made groups and counts instead of regrouping the
+    article list on every request. Buckets are returned as-is and must be
+    treated as read-only.
+    """
+
+    def __init__(self, articles=()):
+        self._buckets = {}
+        self._source_counts = {}
+        self._topic_counts = {}
+        self.total = 0
+        for article in articles:
+            self.add(article)
+
+    def add(self, article):
+        """Insert article into its (source, topic) bucket and update the counts."""
+        source = article.source or UNKNOWN_SOURCE
+        topic = article.topic or DEFAULT_TOPIC
+        pub_ts = article.pub_ts
+        topics = self._buckets.setdefault(source, {})
+        bucket = topics.get(topic)
+        if bucket is None:
+            bucket = topics[topic] = _Bucket()
+        bucket.insert(article, pub_ts)
+        self._source_counts[source] = self._source_counts.get(source, 0) + 1
+        self._topic_counts[topic] = self._topic_counts.get(topic, 0) + 1
+        self.total += 1
+
+    def sources(self):
+        """Return the indexed source names."""
+        return list(self._buckets)
+
+    def topics(self, source):
+        """Return the topics with articles from source."""
+        return list(self._buckets.get(source, {}))
+
+    def articles(self, source, topic):
+        """Return the articles for a source and topic, newest first."""
+        bucket = self._buckets.get(source, {}).get(topic)
+        return bucket.articles if bucket else []
+
+    def grouped(self, source=None):
+        """Return {source: {topic: articles}}, or {topic: articles} for a single source."""
+        if source is not None:
+            return {topic: bucket.articles for topic, bucket in self._buckets.get(source, {}).items()}
+        return {name: self.grouped(name) for name in self._buckets}
+
+    def count(self, source=None, topic=None):
+        """Return the number of articles for a source, a topic, both, or overall."""
+        if source is not None and topic is not None:
+            return len(self.articles(source, topic))
+        if source is not None:
+            return self._source_counts.get(source, 0)
+        if topic is not None:
+            return self._topic_counts.get(topic, 0)
+        return self.total
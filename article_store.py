@@ -0,0 +1,339 @@
+"""SQLite-backed store for articles from every origin (RSS, NewsAPI, Google News)."""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from article import Article
+from dedup import canonicalize_url, title_fingerprint, ORIGIN_RANK
+
+ARTICLE_DB_FILE = os.getenv("ARTICLE_DB_FILE", "articles.db")
+ARTICLE_RETENTION_DAYS = int(os.getenv("ARTICLE_RETENTION_DAYS", "180"))
+# bm25 column weights for title, source and topic: title matches rank highest
+SEARCH_WEIGHTS = (10.0, 2.0, 4.0)
+SEARCH_TERM = re.compile(r"\w+")
+# Copies of a story published further apart than this are stored separately
+STORY_WINDOW_SECONDS = 2 * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url_key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    pub_date TEXT,
+    pub_ts INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    topic TEXT,
+    origin TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_pub_ts ON articles (pub_ts);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source, pub_ts);
+CREATE INDEX IF NOT EXISTS idx_articles_topic ON articles (topic, pub_ts);
+CREATE INDEX IF NOT EXISTS idx_articles_origin ON articles (origin, pub_ts);
+CREATE TABLE IF NOT EXISTS fetch_log (
+    key TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS poll_state (
+    key TEXT PRIMARY KEY,
+    interval REAL NOT NULL,
+    next_due REAL NOT NULL,
+    gap REAL,
+    unchanged REAL NOT NULL,
+    newest_ts INTEGER,
+    polls INTEGER NOT NULL
+);
+"""
+
+# Full-text index over the articles table, kept in step with it by triggers
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+    title, source, topic, content='articles', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, source, topic) VALUES (new.id, new.title, new.source, new.topic);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, source, topic)
+    VALUES ('delete', old.id, old.title, old.source, old.topic);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, source, topic ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, source, topic)
+    VALUES ('delete', old.id, old.title, old.source, old.topic);
+    INSERT INTO articles_fts (rowid, title, source, topic) VALUES (new.id, new.title, new.source, new.topic);
+END;
+"""
+
+
+def search_expression(query):
+    """Turn free text into an FTS5 query matching every word, or None if it has no words.
+
+    Words are quoted, so FTS5 operators and punctuation in the input are
+    searched for literally instead of raising a syntax error.
+    """
+    terms = SEARCH_TERM.findall(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _select_in(conn, sql, values, chunk_size=500):
+    """Yield the rows of sql run over values in chunks, each filling its "IN ({})" placeholder."""
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        yield from conn.execute(sql.format(", ".join("?" * len(chunk))), chunk)
+
+
+def _article(row):
+    return Article(row["title"], row["link"], row["pub_ts"], row["source"], row["topic"])
+
+
+class ArticleStore:
+    """Persists articles in an indexed SQLite database running in WAL mode.
+
+    Each thread gets its own connection. Articles are keyed on their
+    canonical URL, so re-fetching a feed only refreshes fetched_at, and
+    copies of one story from several origins are merged on their title
+    fingerprint (story_key).
+    """
+
+    def __init__(self, path=ARTICLE_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(articles)")}
+            if "story_key" not in columns:
+                conn.execute("ALTER TABLE articles ADD COLUMN story_key TEXT")
+                self._merge_stored_copies(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_story ON articles (story_key, pub_ts)")
+            indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone()
+            conn.executescript(SEARCH_SCHEMA)
+            if not indexed:
+                # Index the articles stored before full-text search existed
+                conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+            conn.execute(
+                "INSERT INTO articles_fts (articles_fts, rank) VALUES ('rank', ?)",
+                (f"bm25({', '.join(str(weight) for weight in SEARCH_WEIGHTS)})",),
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _merge_stored_copies(self, conn):
+        """Fill in story_key for articles stored before it existed and drop their duplicate copies."""
+        kept = {}
+        for row in conn.execute("SELECT id, title, source, pub_ts FROM articles ORDER BY pub_ts").fetchall():
+            story_key = title_fingerprint(row["title"], row["source"])
+            if not story_key:
+                continue
+            copy = kept.get(story_key)
+            if copy is None or row["pub_ts"] - copy["pub_ts"] > STORY_WINDOW_SECONDS:
+                kept[story_key] = row
+                conn.execute("UPDATE articles SET story_key = ? WHERE id = ?", (story_key, row["id"]))
+            elif ORIGIN_RANK.get(row["source"], 0) < ORIGIN_RANK.get(copy["source"], 0):
+                kept[story_key] = row
+                conn.execute("DELETE FROM articles WHERE id = ?", (copy["id"],))
+                conn.execute("UPDATE articles SET story_key = ? WHERE id = ?", (story_key, row["id"]))
+            else:
+                conn.execute("DELETE FROM articles WHERE id = ?", (row["id"],))
+
+    def add_articles(self, articles, origin):
+        """Insert a batch of articles in a single transaction.
+
+        Each story is stored once. An article whose title fingerprint matches
+        one stored from another URL within STORY_WINDOW_SECONDS replaces that
+        copy if it ranks better in ORIGIN_RANK (the original publisher over
+        an aggregator) and is dropped otherwise, so pages read from the store
+        never repeat a story.
+        """
+        now = int(time.time())
+        batch = {}
+        for article in articles:
+            batch.setdefault(canonicalize_url(article.link), article)
+        with self._connect() as conn:
+            stored = {row["url_key"] for row in _select_in(conn, "SELECT url_key FROM articles WHERE url_key IN ({})", list(batch))}
+            conn.executemany("UPDATE articles SET fetched_at = ? WHERE url_key = ?", [(now, url_key) for url_key in stored])
+
+            story_keys = {url_key: title_fingerprint(a.title, a.source) for url_key, a in batch.items() if url_key not in stored}
+            copies = {}
+            for row in _select_in(conn, "SELECT id, source, pub_ts, story_key FROM articles WHERE story_key IN ({})",
+                                  list({key for key in story_keys.values() if key})):
+                copies.setdefault(row["story_key"], []).append({"id": row["id"], "source": row["source"], "pub_ts": row["pub_ts"]})
+
+            inserts, updates = {}, []
+            for url_key, story_key in story_keys.items():
+                article = batch[url_key]
+                row = (url_key, article.title, article.link, article.pub_date, article.pub_ts,
+                       article.source, article.topic, origin, now, story_key)
+                copy = next(
+                    (c for c in copies.get(story_key, ()) if abs(c["pub_ts"] - article.pub_ts) <= STORY_WINDOW_SECONDS), None
+                )
+                if copy is None:
+                    inserts[url_key] = row
+                    if story_key:
+                        copies.setdefault(story_key, []).append({"url_key": url_key, "source": article.source, "pub_ts": article.pub_ts})
+                elif ORIGIN_RANK.get(article.source, 0) < ORIGIN_RANK.get(copy["source"], 0):
+                    if "id" in copy:
+                        updates.append(row + (copy["id"],))
+                    else:
+                        del inserts[copy["url_key"]]
+                        inserts[url_key] = row
+                        copy["url_key"] = url_key
+                    copy.update(source=article.source, pub_ts=article.pub_ts)
+
+            conn.executemany(
+                "INSERT INTO articles (url_key, title, link, pub_date, pub_ts, source, topic, origin, fetched_at, story_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                inserts.values(),
+            )
+            conn.executemany(
+                "UPDATE articles SET url_key = ?, title = ?, link = ?, pub_date = ?, pub_ts = ?, "
+                "source = ?, topic = COALESCE(?, topic), origin = ?, fetched_at = ?, story_key = ? WHERE id = ?",
+                updates,
+            )
+        return len(articles)
+
+    def recent(self, since, source=None, topic=None, origin=None, limit=None):
+        """Return articles published at or after the since timestamp, newest first."""
+        clauses = ["pub_ts >= ?"]
+        params = [int(since)]
+        for column, value in (("source", source), ("topic", topic), ("origin", origin)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        sql = (
+            "SELECT title, link, pub_ts, source, topic FROM articles "
+            f"WHERE {' AND '.join(clauses)} ORDER BY pub_ts DESC, id DESC"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        rows = self._connect().execute(sql, params).fetchall()
+        return [_article(row) for row in rows]
+
+    def iter_articles(self, since, source=None, topic=None, after=None, limit=None, batch_size=200):
+        """Yield (position, article) pairs newest first without loading them all at once.
+
+        position is the (pub_ts, id) of the row, which callers pass back as
+        after to resume from the next row (keyset pagination).
+        """
+        clauses = ["pub_ts >= ?"]
+        params = [int(since)]
+        for column, value in (("source", source), ("topic", topic)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if after is not None:
+            clauses.append("(pub_ts < ? OR (pub_ts = ? AND id < ?))")
+            params.extend([after[0], after[0], after[1]])
+        sql = (
+            "SELECT id, pub_ts, title, link, source, topic FROM articles "
+            f"WHERE {' AND '.join(clauses)} ORDER BY pub_ts DESC, id DESC"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        cursor = self._connect().execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield (row["pub_ts"], row["id"]), _article(row)
+        finally:
+            cursor.close()
+
+    def search(self, query, since=None, until=None, source=None, topic=None, order="rank", limit=20, offset=0):
+        """Full-text search the stored articles and return (total matches, [(article, score)]).
+
+        Results are ordered by bm25 relevance, or newest first with
+        order="date". since and until bound pub_ts, and limit/offset select
+        the page. Matching is done in the FTS5 index, so no articles are
+        scanned.
+        """
+        expression = search_expression(query)
+        if expression is None:
+            return 0, []
+        clauses = []
+        params = []
+        for condition, value in (("a.pub_ts >= ?", since), ("a.pub_ts < ?", until), ("a.source = ?", source), ("a.topic = ?", topic)):
+            if value is not None:
+                clauses.append(condition)
+                params.append(value)
+        conn = self._connect()
+        columns = "a.title, a.link, a.pub_ts, a.source, a.topic"
+
+        if not clauses and order != "date":
+            # Rank and page inside the full-text index, then fetch only the page's rows
+            total = conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH ?", (expression,)).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {columns}, f.rank AS score FROM ("
+                "SELECT rowid, rank FROM articles_fts WHERE articles_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?"
+                ") f JOIN articles a ON a.id = f.rowid ORDER BY f.rank",
+                (expression, int(limit), int(offset)),
+            ).fetchall()
+        else:
+            # CROSS JOIN keeps the index match as the outer loop; otherwise SQLite may walk
+            # idx_articles_source and run the full-text query once per article
+            where = " AND ".join(["articles_fts MATCH ?"] + clauses)
+            params = [expression] + params
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM articles_fts CROSS JOIN articles a ON a.id = articles_fts.rowid WHERE {where}", params
+            ).fetchone()[0]
+            order_by = "a.pub_ts DESC, a.id DESC" if order == "date" else "articles_fts.rank, a.pub_ts DESC"
+            rows = conn.execute(
+                f"SELECT {columns}, articles_fts.rank AS score "
+                f"FROM articles_fts CROSS JOIN articles a ON a.id = articles_fts.rowid WHERE {where} "
+                f"ORDER BY {order_by} LIMIT ? OFFSET ?",
+                params + [int(limit), int(offset)],
+            ).fetchall()
+        # bm25 ranks are negative, lower is better; expose them as higher-is-better
+        return total, [(_article(row), round(-row["score"], 4)) for row in rows]
+
+    def mark_fetched(self, *keys):
+        """Record that the fetches identified by keys have just completed."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO fetch_log (key, fetched_at) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET fetched_at = excluded.fetched_at",
+                [(key, now) for key in keys],
+            )
+
+    def last_fetched(self, key):
+        """Return the epoch timestamp of the last completed fetch for key, or None."""
+        row = self._connect().execute("SELECT fetched_at FROM fetch_log WHERE key = ?", (key,)).fetchone()
+        return row["fetched_at"] if row else None
+
+    def poll_states(self):
+        """Return every poll_state row (key, interval, next_due, gap, unchanged, newest_ts, polls)."""
+        return self._connect().execute(
+            "SELECT key, interval, next_due, gap, unchanged, newest_ts, polls FROM poll_state"
+        ).fetchall()
+
+    def save_poll_states(self, rows):
+        """Insert or replace poll_state rows in a single transaction."""
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO poll_state VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def prune(self, days=ARTICLE_RETENTION_DAYS):
+        """Delete articles published more than the given number of days ago."""
+        cutoff = int(time.time()) - days * 86400
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM articles WHERE pub_ts < ?", (cutoff,)).rowcount
+        if deleted:
+            logging.info(f"Pruned {deleted} articles older than {days} days")
+        return deleted
@@ -0,0 +1,34 @@
+"""Atomic replacement of state files, so readers never see a partly written one."""
+import errno
+import os
+import tempfile
+
+
+def _write_synced(file, data):
+    file.write(data)
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def atomic_write(path, data):
+    """Replace the file at path with data (str or bytes).
+
+    data is written to a temporary file in the same directory, synced and
+    renamed over path. A single file bind-mounted into a container cannot be
+    replaced by a rename, so it is rewritten in place instead. Raises
+    OSError if the file cannot be written.
+    """
+    mode = 'wb' if isinstance(data, (bytes, bytearray)) else 'w'
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, mode) as file:
+            _write_synced(file, data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        if e.errno not in (errno.EBUSY, errno.EXDEV):
+            raise
+        with open(path, mode) as file:
+            _write_synced(file, data)
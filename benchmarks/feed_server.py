@@ -0,0 +1,187 @@
+"""Local stand-in for the news feeds, replaying the fixtures with fresh dates.
+
+Serves
+    /rss/<n>    the WordPress-style RSS fixture as feed n
+    /atom/<n>   the Blogger-style Atom fixture as feed n
+    /google     the Google News search fixture (for any query)
+    /newsapi    the NewsAPI /v2/everything fixture
+
+Each feed is expanded to --items entries by cycling through the fixture's
+entries with unique titles and links, and re-dated so the newest entry is a
+few minutes old and the rest follow every --spacing minutes. Bodies are built
+once per feed and served with a strong ETag, so conditional requests get a
+304. --latency/--jitter delay every response and --error-rate makes that
+fraction of feeds (always the same ones) answer 500.
+
+Bind to 0.0.0.0 (the default) so feeds can be spread over 127.0.0.0/8
+addresses, which keeps the app's per-host fetch limit from serialising them.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURES = {
+    "rss": ("wordpress_rss.xml", "item", "application/rss+xml"),
+    "atom": ("blogger_atom.xml", "entry", "application/atom+xml"),
+    "google": ("google_news_rss.xml", "item", "application/rss+xml"),
+}
+NEWSAPI_FIXTURE = "newsapi_everything.json"
+
+TITLE = re.compile(r"(<title[^>]*>)(.*?)(</title>)", re.S)
+RSS_LINK = re.compile(r"(<link>)(.*?)(</link>)", re.S)
+ATOM_LINK = re.compile(r"(<link rel='alternate'[^>]*href=')([^']*)(')")
+RSS_DATE = re.compile(r"(<pubDate>)(.*?)(</pubDate>)")
+ATOM_DATES = re.compile(r"(<(published|updated)>)(.*?)(</\2>)")
+
+
+def _tag_url(url, marker, ampersand="&amp;"):
+    separator = ampersand if "?" in url else "?"
+    return f"{url}{separator}entry={marker}"
+
+
+def _split_entries(document, tag):
+    """Split a feed document into (head, [entry blocks], tail)."""
+    pattern = re.compile(rf"<{tag}>.*?</{tag}>", re.S)
+    blocks = pattern.findall(document)
+    first = document.index(blocks[0])
+    last = document.rindex(blocks[-1]) + len(blocks[-1])
+    return document[:first], blocks, document[last:]
+
+
+class FeedBuilder:
+    """Builds the expanded, re-dated bodies for each feed path."""
+
+    def __init__(self, items, spacing_minutes):
+        self.items = items
+        self.spacing = timedelta(minutes=spacing_minutes)
+        self.now = datetime.now(timezone.utc) - timedelta(minutes=5)
+        self.templates = {}
+        for kind, (filename, tag, mimetype) in FIXTURES.items():
+            with open(os.path.join(FIXTURES_DIR, filename), encoding="utf-8") as file:
+                self.templates[kind] = (_split_entries(file.read(), tag), mimetype)
+        with open(os.path.join(FIXTURES_DIR, NEWSAPI_FIXTURE), encoding="utf-8") as file:
+            self.newsapi = json.load(file)
+
+    def _entry(self, kind, block, feed, index):
+        published = self.now - self.spacing * index
+        marker = f"{feed}-{index}"
+        # Prefix rather than suffix the marker: dedup strips " - Publisher" title suffixes
+        block = TITLE.sub(lambda m: f"{m.group(1)}[{marker}] {m.group(2)}{m.group(3)}", block, count=1)
+        if kind == "atom":
+            block = ATOM_LINK.sub(lambda m: f"{m.group(1)}{_tag_url(m.group(2), marker)}{m.group(3)}", block, count=1)
+            iso = published.isoformat(timespec="seconds")
+            return ATOM_DATES.sub(lambda m: f"{m.group(1)}{iso}{m.group(4)}", block)
+        block = RSS_LINK.sub(lambda m: f"{m.group(1)}{_tag_url(m.group(2), marker)}{m.group(3)}", block, count=1)
+        return RSS_DATE.sub(lambda m: f"{m.group(1)}{format_datetime(published)}{m.group(3)}", block, count=1)
+
+    def build(self, kind, feed):
+        """Return (body bytes, mimetype) for one feed."""
+        if kind == "newsapi":
+            articles = []
+            for index in range(self.items):
+                article = dict(self.newsapi["articles"][index % len(self.newsapi["articles"])])
+                article["title"] = f"[{feed}-{index}] {article['title']}"
+                article["url"] = _tag_url(article["url"], f"{feed}-{index}", ampersand="&")
+                article["publishedAt"] = (self.now - self.spacing * index).strftime("%Y-%m-%dT%H:%M:%SZ")
+                articles.append(article)
+            body = dict(self.newsapi, totalResults=len(articles), articles=articles)
+            return json.dumps(body).encode("utf-8"), "application/json"
+
+        (head, blocks, tail), mimetype = self.templates[kind]
+        entries = [self._entry(kind, blocks[index % len(blocks)], feed, index) for index in range(self.items)]
+        return (head + "".join(entries) + tail).encode("utf-8"), mimetype
+
+
+def make_handler(builder, latency, jitter, error_rate):
+    cache = {}
+    cache_lock = threading.Lock()
+
+    class FeedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b"", headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            parts = path.strip("/").split("/")
+            kind = parts[0]
+            feed = parts[1] if len(parts) > 1 else kind
+            if kind not in FIXTURES and kind != "newsapi":
+                return self._send(404)
+
+            if latency or jitter:
+                time.sleep(max(0.0, random.gauss(latency, jitter)))
+            # Fail the same feeds on every run so results stay comparable
+            if zlib.crc32(path.encode()) % 1000 < error_rate * 1000:
+                return self._send(500, b"Internal Server Error")
+
+            with cache_lock:
+                cached = cache.get(path)
+            if cached is None:
+                body, mimetype = builder.build(kind, feed)
+                cached = (body, gzip.compress(body, 6), mimetype, hashlib.sha256(body).hexdigest()[:16])
+                with cache_lock:
+                    cache[path] = cached
+            body, gzipped, mimetype, etag = cached
+
+            headers = [("ETag", f'"{etag}"'), ("Content-Type", mimetype)]
+            if self.headers.get("If-None-Match") == f'"{etag}"':
+                return self._send(304, headers=headers)
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                headers.append(("Content-Encoding", "gzip"))
+                body = gzipped
+            self._send(200, body, headers)
+
+    return FeedHandler
+
+
+def serve(host="0.0.0.0", port=8900, items=50, spacing=20, latency=0.0, jitter=0.0, error_rate=0.0):
+    """Create the feed server; call serve_forever() on the result to run it."""
+    builder = FeedBuilder(items, spacing)
+    server = ThreadingHTTPServer((host, port), make_handler(builder, latency, jitter, error_rate))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--items", type=int, default=50, help="entries per feed (payload size)")
+    parser.add_argument("--spacing", type=float, default=20, help="minutes between entries")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of feeds that answer 500")
+    args = parser.parse_args()
+    server = serve(args.host, args.port, args.items, args.spacing, args.latency, args.jitter, args.error_rate)
+    print(f"Serving fixtures on {args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Offline benchmark of ingestion and rendering against the local feed server.
+
+For each source count the app is imported in a fresh subprocess, with its
+config, article database and feed cache in a temporary directory and every
+feed pointed at feed_server.py. Each run measures:
+
+    cold_wall / cold_cpu    first get_dashboard_data(): fetch, parse, store, publish
+    warm_wall / warm_cpu    a second forced ingestion, answered with 304s
+    render_wall             rendering the dashboard page for the snapshot
+    peak_rss_mb             peak resident memory of the process
+    stage_cpu               CPU seconds per stage, summed over threads
+
+Results are compared with baseline.json and the script exits non-zero when
+a timing or memory figure regresses by more than --tolerance. Baselines are
+machine-specific: re-record them with --save-baseline on the machine the
+comparison runs on.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SIZES = "10,100,1000"
+# Figures gated against the baseline, with the smallest change worth reporting
+GATED = {"cold_wall": 0.05, "warm_wall": 0.05, "render_wall": 0.02, "cold_cpu": 0.05, "peak_rss_mb": 5}
+# Spread feeds over this many loopback addresses so the per-host fetch limit applies as it would in production
+LOOPBACK_HOSTS = 250
+
+
+def feed_host(index):
+    return f"127.0.{index // LOOPBACK_HOSTS}.{index % LOOPBACK_HOSTS + 1}"
+
+
+def write_config(directory, sources, port):
+    """Write news_sources.json, topics.json and the secrets the app reads."""
+    news_sources = [
+        {"name": f"Bench Feed {index}", "url": f"http://{feed_host(index)}:{port}/{('rss', 'atom')[index % 2]}/{index}"}
+        for index in range(sources)
+    ]
+    with open(os.path.join(directory, "news_sources.json"), "w") as file:
+        json.dump(news_sources, file)
+    shutil.copy(os.path.join(BENCHMARK_DIR, "fixtures", "topics.json"), directory)
+    for name in ("newsapi.secret", "secret_key.secret"):
+        with open(os.path.join(directory, name), "w") as file:
+            file.write("benchmark")
+
+
+def run_worker(sources, port):
+    """Measure one source count in this process and return the results."""
+    sys.path.insert(0, REPO_DIR)
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    import threading
+    import app
+    import ingestion
+    import metrics
+
+    stage_cpu = {}
+    stage_lock = threading.Lock()
+
+    def timed(stage, func):
+        # thread_time() is per-thread CPU, so concurrent fetch threads are measured correctly
+        def wrapper(*args, **kwargs):
+            start = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.thread_time() - start
+                with stage_lock:
+                    stage_cpu[stage] = stage_cpu.get(stage, 0.0) + elapsed
+        return wrapper
+
+    app.parse_feed_entries = timed("parse", app.parse_feed_entries)
+    app.article_store.add_articles = timed("store", app.article_store.add_articles)
+    app.article_store.recent = timed("snapshot_query", app.article_store.recent)
+    ingestion.dedupe_articles = timed("dedupe", ingestion.dedupe_articles)
+    ingestion.ArticleIndex = timed("index", ingestion.ArticleIndex)
+
+    results = {"sources": sources}
+    start, cpu = time.perf_counter(), time.process_time()
+    articles = app.get_dashboard_data()
+    results["cold_wall"] = time.perf_counter() - start
+    results["cold_cpu"] = time.process_time() - cpu
+    results["articles"] = len(articles)
+    results["stage_cpu"] = dict(stage_cpu)
+    results["stage_cpu"]["other"] = results["cold_cpu"] - sum(stage_cpu.values())
+
+    start, cpu = time.perf_counter(), time.process_time()
+    app.ingestor.run_due(force=True)
+    results["warm_wall"] = time.perf_counter() - start
+    results["warm_cpu"] = time.process_time() - cpu
+
+    client = app.app.test_client()
+    start = time.perf_counter()
+    client.get("/")
+    results["render_wall"] = time.perf_counter() - start
+
+    results["pending"] = metrics.FETCH_JOB_TIMEOUTS.total()
+    # ru_maxrss is in kilobytes on Linux
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    stop_at = time.monotonic() + timeout
+    while time.monotonic() < stop_at:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Feed server did not start on port {port}")
+
+
+def run_size(sources, port, args):
+    """Run one source count in a fresh interpreter and return its results."""
+    directory = tempfile.mkdtemp(prefix=f"bench-{sources}-")
+    try:
+        write_config(directory, sources, port)
+        env = dict(
+            os.environ,
+            INGEST_ENABLED="0",
+            FETCH_DEADLINE=str(args.deadline),
+            NEWSAPI_KEY_FILE=os.path.join(directory, "newsapi.secret"),
+            SECRET_KEY_FILE=os.path.join(directory, "secret_key.secret"),
+            NEWSAPI_URL=f"http://127.0.0.1:{port}/newsapi",
+            GOOGLE_NEWS_RSS_URL=f"http://127.0.0.1:{port}/google",
+            ARTICLE_DB_FILE=os.path.join(directory, "articles.db"),
+            FEED_CACHE_FILE=os.path.join(directory, "feed_cache.json"),
+        )
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(sources), "--port", str(port)],
+            cwd=directory, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """Print each gated figure against the baseline and return the regressions."""
+    regressions = []
+    for result in results:
+        base = baseline.get(str(result["sources"]))
+        print(f"\n{result['sources']} sources ({result['articles']} articles, {result['pending']} pending)")
+        for name in GATED:
+            line = f"  {name:<12} {result[name]:10.3f}"
+            if base and name in base:
+                change = result[name] - base[name]
+                line += f"   baseline {base[name]:10.3f}   {change:+.3f}"
+                if change > base[name] * tolerance and change > GATED[name]:
+                    line += "   REGRESSION"
+                    regressions.append((result["sources"], name))
+            print(line)
+        stages = ", ".join(f"{stage} {seconds:.3f}" for stage, seconds in sorted(result["stage_cpu"].items()))
+        print(f"  stage cpu    {stages}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated source counts")
+    parser.add_argument("--items", type=int, default=50, help="entries per feed")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean feed response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="fraction of feeds that answer 500")
+    parser.add_argument("--deadline", type=float, default=120, help="FETCH_DEADLINE for the runs")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="record these results as the new baseline")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_worker(args.worker, args.port)))
+        return 0
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARK_DIR, "feed_server.py"), "--port", str(port),
+         "--items", str(args.items), "--latency", str(args.latency), "--jitter", str(args.jitter),
+         "--error-rate", str(args.error_rate)],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        results = [run_size(int(size), port, args) for size in args.sizes.split(",")]
+    finally:
+        server.terminate()
+        server.wait()
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as file:
+            baseline = json.load(file)
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+
+    if args.save_baseline:
+        baseline = {
+            "recorded_at": time.strftime("%Y-%m-%d"),
+            "settings": {name: getattr(args, name) for name in ("items", "latency", "jitter", "error_rate", "deadline")},
+            "results": {str(result["sources"]): result for result in results},
+        }
+        with open(BASELINE_FILE, "w") as file:
+            json.dump(baseline, file, indent=4)
+        print(f"\nSaved baseline to {BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""In-process cache for the JSON config files with mtime invalidation and atomic writes."""
+import copy
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+
+from atomic_file import atomic_write
+from single_flight import file_lock
+
+_UNLOADED = object()
+
+
+def freeze(value):
+    """Return a read-only copy of parsed JSON (dicts become mappings, lists become tuples)."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ConfigFile:
+    """A JSON config file served from memory until it changes on disk.
+
+    The file is re-read only when its mtime, inode or size change, which also
+    catches edits made through a bind mount or by another gunicorn worker.
+    load turns the raw JSON into the value callers see and dump does the
+    reverse. Readers get an immutable snapshot; writers go through update(),
+    which holds an exclusive lock file and replaces the file atomically.
+    """
+
+    def __init__(self, path, load=None, dump=None, default=()):
+        self.path = path
+        self._load = load or (lambda raw: raw)
+        self._dump = dump or (lambda value: value)
+        self._default = default
+        self._stat_key = _UNLOADED
+        self._value = freeze(default)
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _read(self):
+        """Read and parse the file from disk, returning the default on errors."""
+        if not os.path.exists(self.path):
+            logging.warning(f"Config file '{self.path}' not found.")
+            return copy.deepcopy(self._default)
+        try:
+            with open(self.path, 'r') as file:
+                return self._load(json.load(file))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.error(f"Error reading config file '{self.path}': {e}")
+            return copy.deepcopy(self._default)
+
+    def _current_stat_key(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def snapshot(self):
+        """Return the current contents as an immutable value."""
+        stat_key = self._current_stat_key()
+        if stat_key == self._stat_key:
+            return self._value
+        with self._lock:
+            if stat_key != self._stat_key:
+                self._value = freeze(self._read())
+                self._stat_key = stat_key
+                self.version += 1
+            return self._value
+
+    def _write_locked(self, value):
+        atomic_write(self.path, json.dumps(self._dump(value), indent=4))
+        self._stat_key = _UNLOADED
+
+    def update(self, mutate):
+        """Apply mutate to a fresh, mutable copy of the file and write it back.
+
+        The read-modify-write runs under the lock file, so concurrent updates
+        from several workers cannot overwrite each other. Returns whatever
+        mutate returns; if it returns False nothing is written.
+        """
+        with file_lock(f"{self.path}.lock"):
+            value = self._read()
+            result = mutate(value)
+            if result is not False:
+                self._write_locked(value)
+            return result
@@ -0,0 +1,97 @@
+"""Publication-date parsing shared by every fetcher.
+
+Feeds use a handful of formats (RFC 822 for RSS, RFC 3339 for Atom and
+NewsAPI, plain "YYYY-MM-DD HH:MM:SS" for our own stored values). Each source
+tends to stick to one, so the format that last worked for a source is tried
+first. Parsers return None instead of raising, and failures are counted per
+source rather than replaced with the current time.
+"""
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_tz
+
+
+def _parse_iso(text):
+    """Parse RFC 3339 / ISO 8601, including a trailing Z and numeric offsets."""
+    if len(text) < 10 or text[4] != "-" or not text[:4].isdigit():
+        return None
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_rfc822(text):
+    """Parse RFC 822 / RFC 2822 dates such as "Tue, 01 Oct 2024 10:00:00 +0000"."""
+    parsed = parsedate_tz(text)
+    if parsed is None:
+        return None
+    try:
+        # A missing zone is treated as UTC rather than server-local time
+        return datetime(*parsed[:6]) - timedelta(seconds=parsed[9] or 0)
+    except (OverflowError, ValueError):
+        return None
+
+
+PARSERS = {
+    "rfc822": _parse_rfc822,
+    "iso": _parse_iso,
+}
+
+_last_format = {}
+_failures = Counter()
+_lock = threading.Lock()
+
+
+def parse_pub_date(text, source=None):
+    """Parse a publication date into a naive UTC datetime, or None if it cannot be parsed."""
+    if text:
+        text = text.strip()
+    if not text:
+        with _lock:
+            _failures[source] += 1
+        return None
+
+    preferred = _last_format.get(source)
+    if preferred:
+        parsed = PARSERS[preferred](text)
+        if parsed is not None:
+            return parsed
+
+    for name, parser in PARSERS.items():
+        if name == preferred:
+            continue
+        parsed = parser(text)
+        if parsed is not None:
+            _last_format[source] = name
+            return parsed
+
+    with _lock:
+        _failures[source] += 1
+    return None
+
+
+def parse_date(text):
+    """Parse a date that does not come from a feed, such as a request parameter.
+
+    Accepts the same formats as parse_pub_date but leaves the per-source
+    format memo and the failure counts alone.
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    for parser in PARSERS.values():
+        parsed = parser(text)
+        if parsed is not None:
+            return parsed
+    return None
+
+
+def parse_failures():
+    """Return the number of unparseable or missing dates seen per source."""
+    with _lock:
+        return dict(_failures)
@@ -0,0 +1,114 @@
+"""Cross-source article deduplication by canonical URL and title fingerprint."""
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_hsenc", "_hsmi", "cmpid", "ocid", "oc", "ref", "ref_src", "spm", "sr_share",
+    "ito", "taid", "utm_id", "ns_source", "ns_mchannel", "ns_campaign",
+}
+TRACKING_PREFIXES = ("utm_", "__twitter", "_ga")
+
+# Redirector hosts and the query parameter that holds the real target
+REDIRECTORS = {
+    "www.google.com": ("url", "q"),
+    "google.com": ("url", "q"),
+    "l.facebook.com": ("u",),
+    "out.reddit.com": ("url",),
+    "www.linkedin.com": ("url",),
+    "r.search.yahoo.com": ("RU",),
+}
+
+# Publisher suffixes such as " - BleepingComputer" or " | SecurityWeek"
+TITLE_SUFFIX = re.compile(r"\s+[-|–—]\s+([^-|–—]{1,40})$")
+NON_WORD = re.compile(r"[^\w\s]+")
+MIN_FINGERPRINT_WORDS = 4
+
+# Lower rank wins when two copies of the same story are found
+ORIGIN_RANK = {"NewsAPI": 1, "Google News": 2}
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """Return a canonical form of url for duplicate detection.
+
+    Known redirectors are unwrapped, tracking parameters and fragments are
+    dropped, the scheme and host are lower-cased, a leading "www." and a
+    trailing slash are removed and the remaining parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for _ in range(3):
+        targets = REDIRECTORS.get(host)
+        if not targets:
+            break
+        params = dict(parse_qsl(parts.query))
+        target = next((params[name] for name in targets if params.get(name, "").startswith("http")), None)
+        if not target:
+            break
+        parts = urlsplit(target)
+        host = parts.netloc.lower()
+
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(k))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), host, path, urlencode(query), ""))
+
+
+def _strip_publisher(title, source):
+    """Drop a trailing publisher name, which aggregators append but other copies lack.
+
+    The suffix is only taken to be a publisher when the article came from an
+    aggregator or the suffix names the article's own source, so titles such
+    as "Patch Tuesday - March" keep their distinguishing tail.
+    """
+    match = TITLE_SUFFIX.search(title)
+    if not match:
+        return title
+    if source in ORIGIN_RANK or (source and match.group(1).strip().casefold() == source.strip().casefold()):
+        return title[:match.start()]
+    return title
+
+
+def title_fingerprint(title, source=None):
+    """Hash a normalized title, or return None if it is too short to be distinctive."""
+    if not title:
+        return None
+    title = _strip_publisher(title.strip(), source)
+    words = NON_WORD.sub(" ", title.lower()).split()
+    if len(words) < MIN_FINGERPRINT_WORDS:
+        return None
+    return hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def dedupe_articles(articles):
+    """Drop duplicate stories, keeping the original publisher's copy when there is one.
+
+    Runs in a single pass: each article's canonical URL and title fingerprint
+    are looked up in a seen-index that points at the slot of the copy kept so
+    far. Output order follows the first occurrence of each story.
+    """
+    kept = []
+    seen = {}
+    for article in articles:
+        keys = [("url", canonicalize_url(article.link))]
+        fingerprint = title_fingerprint(article.title, article.source)
+        if fingerprint:
+            keys.append(("title", fingerprint))
+
+        slot = next((seen[key] for key in keys if key in seen), None)
+        if slot is None:
+            slot = len(kept)
+            kept.append(article)
+        elif ORIGIN_RANK.get(article.source, 0) < ORIGIN_RANK.get(kept[slot].source, 0):
+            kept[slot] = article
+        for key in keys:
+            seen.setdefault(key, slot)
+    return kept
@@ -1,92 +1,207 @@
+import html
+import json
 import logging
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import requests
+import http_client
 import os
 from dotenv import load_dotenv
+from article import Article
+from mailer import Mailer
+from sent_ledger import SentLedger, article_key
+from single_flight import file_lock
 
 # Load environment variables from .env file
 load_dotenv()
 
 def get_secret(filepath):
     """Read a Docker secret from a file."""
+    if not filepath:
+        return None
     try:
         with open(filepath, 'r') as file:
             return file.read().strip()
     except FileNotFoundError:
         return None
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('email_scheduler.log'),
-        logging.StreamHandler()
-    ]
-)
-
 # Credentials from environment/secrets
 EMAIL_USER = get_secret(os.getenv("EMAIL_USER_FILE"))
 EMAIL_PASSWORD = get_secret(os.getenv("EMAIL_PASSWORD_FILE"))
 EMAIL_RECEIVER = get_secret(os.getenv("EMAIL_RECEIVER_FILE"))
 DASHBOARD_URL = os.getenv("DASHBOARD_URL", "http://localhost:31337")
-
-def fetch_dashboard_data():
-    """Fetch news data from the running dashboard."""
+EMAIL_RECIPIENTS_FILE = os.getenv("EMAIL_RECIPIENTS_FILE", "recipients.json")
+BRIEFING_LOCK_FILE = os.getenv("BRIEFING_LOCK_FILE", "briefing.lock")
+BRIEFING_WINDOW_SECONDS = 24 * 3600
+# Re-read a little before the last run so late-arriving articles are not missed
+LEDGER_OVERLAP_SECONDS = 6 * 3600
+
+def load_recipients():
+    """Load the digest recipients and the topics each one is subscribed to.
+
+    recipients.json holds a list of {"email": ..., "topics": [...]}; an empty
+    or missing topics list means every topic. Without the file, each address
+    in EMAIL_RECEIVER (comma-separated) receives every topic.
+    """
+    if os.path.exists(EMAIL_RECIPIENTS_FILE):
+        try:
+            with open(EMAIL_RECIPIENTS_FILE, 'r') as file:
+                recipients = json.load(file)
+            return [
+                {"email": entry["email"].strip(), "topics": entry.get("topics") or []}
+                for entry in recipients if entry.get("email")
+            ]
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            logging.error(f"Error loading recipients from {EMAIL_RECIPIENTS_FILE}: {e}")
+            return []
+    return [{"email": address.strip(), "topics": []} for address in (EMAIL_RECEIVER or "").split(",") if address.strip()]
+
+def filter_by_topics(news_items, topics):
+    """Return the news items whose topic is one of topics (all items if topics is empty)."""
+    if not topics:
+        return news_items
+    wanted = set(topics)
+    return [news for news in news_items if news.topic in wanted]
+
+def fetch_dashboard_data(since=None):
+    """Fetch news data published since the given epoch time from the running dashboard."""
+    if since is None:
+        since = time.time() - BRIEFING_WINDOW_SECONDS
     try:
-        response = requests.get(f"{DASHBOARD_URL}/dashboard_data")
+        response = http_client.get(f"{DASHBOARD_URL}/dashboard_data", params={"since": int(since)})
         response.raise_for_status()
-        return response.json()
+        articles = (Article.from_dict(item) for item in response.json())
+        return [article for article in articles if article is not None]
     except Exception as e:
         logging.error(f"Error fetching dashboard data: {str(e)}")
         return []
 
 def format_email_content(news_items):
-    """Format news items for email content."""
-    content = "Daily Cybersecurity Briefing\n\n"
+    """Format news items for the plain-text email body."""
+    parts = ["Daily Cybersecurity Briefing\n\n"]
     for news in news_items:
-        title = news.get("title", "No Title")
-        link = news.get("link", "No Link")
-        pub_date = news.get("pub_date", "Unknown Date")
-        source = news.get("source", "Unknown Source")
-        topic = news.get("topic", "General")
-
-        content += f"- {title}\n  Source: {source}\n  Topic: {topic}\n  Published: {pub_date}\n  Link: {link}\n\n"
-
-    return content
-
-def send_email():
-    """Send an email with the latest news."""
-    logging.info("Starting email sending process")
+        title = news.title or "No Title"
+        link = news.link or "No Link"
+        pub_date = news.pub_date
+        source = news.source
+        topic = news.topic or "General"
 
-    if not all([EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER]):
-        logging.error("Email credentials are not set.")
-        return
+        parts.append(f"- {title}\n  Source: {source}\n  Topic: {topic}\n  Published: {pub_date}\n  Link: {link}\n\n")
 
-    news_items = fetch_dashboard_data()
-    content = format_email_content(news_items)
+    return "".join(parts)
 
-    subject = "Daily Cybersecurity Briefing"
-    msg = MIMEMultipart()
+def format_email_html(news_items):
+    """Format news items for the HTML email body."""
+    parts = ["<html><body><h1>Daily Cybersecurity Briefing</h1><ul>\n"]
+    for news in news_items:
+        title = html.escape(news.title or "No Title")
+        link = html.escape(news.link, quote=True)
+        pub_date = html.escape(news.pub_date)
+        source = html.escape(news.source)
+        topic = html.escape(news.topic or "General")
+
+        parts.append(
+            f'<li><a href="{link}">{title}</a><br>'
+            f"<small>{source} &middot; {topic} &middot; {pub_date}</small></li>\n"
+        )
+    parts.append("</ul></body></html>")
+    return "".join(parts)
+
+def build_message(receiver, plain, html_body):
+    """Build the multipart/alternative digest for one recipient."""
+    msg = MIMEMultipart("alternative")
     msg["From"] = EMAIL_USER
-    msg["To"] = EMAIL_RECEIVER
-    msg["Subject"] = subject
+    msg["To"] = receiver
+    msg["Subject"] = "Daily Cybersecurity Briefing"
+    # utf-8 bodies are base64-encoded, which also keeps long lines within SMTP limits
+    msg.attach(MIMEText(plain, "plain", "utf-8"))
+    msg.attach(MIMEText(html_body, "html", "utf-8"))
+    return msg
+
+def send_briefing(news_items, store=None):
+    """Send each recipient a digest of the news items in their topics they have not received yet.
+
+    Every gunicorn worker schedules the briefing, so the send runs under a
+    lock file and a worker that cannot take it returns at once. With an
+    ArticleStore, the day's run is also recorded in its fetch log under
+    "briefing:<date>", so a worker whose job fires later that day, with a
+    newer snapshot, does not send a second briefing.
+    """
+    recipients = load_recipients()
+    if not EMAIL_USER or not recipients:
+        logging.error("Email sender or recipients are not set.")
+        return
+    if not news_items:
+        logging.info("No new articles since the last briefing; nothing to send.")
+        return
 
-    msg.attach(MIMEText(content, "plain"))
+    with file_lock(BRIEFING_LOCK_FILE, timeout=0) as acquired:
+        if not acquired:
+            logging.info("Briefing is already being sent by another process; skipping.")
+            return
+        run_key = f"briefing:{time.strftime('%Y-%m-%d')}"
+        if store is not None and store.last_fetched(run_key):
+            logging.info("Today's briefing has already been sent; skipping.")
+            return
+        # A run where every send failed is not recorded, so a later run that day can try again
+        if _send_digests(recipients, news_items, SentLedger()) and store is not None:
+            store.mark_fetched(run_key)
+
+def _send_digests(recipients, news_items, ledger):
+    """Send the digests over one SMTP session, record what each recipient got and return how many were sent."""
+    # Recipients with the same topics usually get the same digest, so render each one once
+    rendered = {}
+    sent = failed = 0
+    with Mailer(EMAIL_USER, EMAIL_PASSWORD) as mailer:
+        for recipient in recipients:
+            receiver = recipient["email"]
+            items = ledger.unsent(filter_by_topics(news_items, recipient["topics"]), receiver)
+            if not items:
+                logging.info(f"No new articles for {receiver}; skipping.")
+                continue
+
+            digest_key = tuple(article_key(news) for news in items)
+            if digest_key not in rendered:
+                rendered[digest_key] = (format_email_content(items), format_email_html(items))
+            try:
+                error = mailer.send(build_message(receiver, *rendered[digest_key]))
+            except smtplib.SMTPAuthenticationError as e:
+                # Every remaining recipient would retry the login, which can get the account locked
+                logging.error(f"SMTP login rejected; stopping the briefing: {e}")
+                break
+            if error:
+                failed += 1
+                logging.error(f"Error sending email to {receiver}: {error}")
+                continue
+
+            sent += 1
+            ledger.mark_sent(items, receiver)
+            logging.info(f"Email sent to {receiver} with {len(items)} new articles.")
+
+    logging.info(f"Briefing fan-out finished: {sent} sent, {failed} failed.")
+    if sent:
+        ledger.save()
+    return sent
 
-    try:
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(EMAIL_USER, EMAIL_PASSWORD)
-            server.send_message(msg)
-            logging.info("Email sent successfully.")
-    except Exception as e:
-        logging.error(f"Error sending email: {str(e)}")
+def send_email():
+    """Fetch the new articles from the running dashboard and send the briefing."""
+    logging.info("Starting email sending process")
+    last_run = SentLedger().last_run
+    since = last_run - LEDGER_OVERLAP_SECONDS if last_run else None
+    send_briefing(fetch_dashboard_data(since))
 
 def main():
     """Main function to send email."""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('email_scheduler.log'),
+            logging.StreamHandler()
+        ]
+    )
     logging.info("Email scheduler script started")
     send_email()
     logging.info("Email scheduler script completed")
@@ -0,0 +1,144 @@
+"""HTTP conditional-GET cache for parsed feeds, persisted to disk."""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from atomic_file import atomic_write
+
+FEED_CACHE_FILE = os.getenv("FEED_CACHE_FILE", "feed_cache.json")
+FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "500"))
+FEED_CACHE_MAX_AGE = int(os.getenv("FEED_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+CACHE_FORMAT_VERSION = 3
+
+
+def _covers(entry, limit, since):
+    """True if a cached parse holds every item a request for limit items published after since needs."""
+    if entry["limit"] < limit:
+        return False
+    return entry["since"] is None or (since is not None and entry["since"] <= since)
+
+
+class FeedCache:
+    """Stores the ETag, Last-Modified and parsed items for each feed URL.
+
+    A parse stops after limit items, and optionally at items published
+    before since, so both are stored with the items. Conditional headers are
+    only sent when the cached parse covers what the caller asks for, so a
+    304 never replays a shorter list. Entries are kept in least-recently-used order and evicted once there are
+    more than max_entries of them or they have not been revalidated for
+    max_age seconds. hits counts 304 responses answered from the cache and
+    misses counts full downloads.
+    """
+
+    def __init__(self, path=FEED_CACHE_FILE, max_entries=FEED_CACHE_MAX_ENTRIES, max_age=FEED_CACHE_MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Load entries from disk on first use. Caller must hold the lock."""
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+            if data.get("version") == CACHE_FORMAT_VERSION:
+                self._entries.update(data.get("entries", {}))
+        except (OSError, ValueError, AttributeError) as e:
+            logging.error(f"Error loading feed cache {self.path}: {e}")
+        self._evict()
+
+    def _evict(self):
+        """Drop expired entries and trim to max_entries. Caller must hold the lock."""
+        cutoff = time.time() - self.max_age
+        for url in [url for url, entry in self._entries.items() if entry["stored_at"] < cutoff]:
+            del self._entries[url]
+            self._dirty = True
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+    def request_headers(self, url, limit, since=None):
+        """Return the conditional request headers to send for a parse of url with limit and since."""
+        with self._lock:
+            self._load()
+            self._evict()
+            entry = self._entries.get(url)
+            headers = {}
+            if entry and _covers(entry, limit, since):
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def not_modified(self, url):
+        """Return the cached items for url after a 304, or None if they are gone."""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            entry["stored_at"] = time.time()
+            self._entries.move_to_end(url)
+            self._dirty = True
+            self.hits += 1
+            return entry["items"]
+
+    def store(self, url, response, items, limit, since=None):
+        """Remember the validators from a full response along with its parsed items and their bounds."""
+        with self._lock:
+            self._load()
+            self.misses += 1
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if not etag and not last_modified:
+                # Nothing to revalidate with, so there is no point keeping the parse
+                if self._entries.pop(url, None) is not None:
+                    self._dirty = True
+                return
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "items": items,
+                "limit": limit,
+                "since": since,
+                "stored_at": time.time(),
+            }
+            self._entries.move_to_end(url)
+            self._dirty = True
+            self._evict()
+
+    def stats(self):
+        """Return hit/miss counters for the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries or {}),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def save(self):
+        """Write the cache to disk atomically if it has changed."""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            data = {"version": CACHE_FORMAT_VERSION, "entries": self._entries}
+            try:
+                atomic_write(self.path, json.dumps(data))
+                self._dirty = False
+            except OSError as e:
+                logging.error(f"Error saving feed cache {self.path}: {e}")
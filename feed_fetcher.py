@@ -0,0 +1,108 @@
+"""Concurrent fetching of news feeds with per-host limits and a global deadline."""
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import metrics
+
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "2"))
+FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", "25"))
+
+
+class FetchJob:
+    """A single unit of work: call func(*args) for the feed at url.
+
+    interval is how often, in seconds, the job should be polled by the
+    background ingestor (None lets the poll scheduler adapt it to how often
+    the feed publishes, starting from the ingestor's default) and origin is
+    the kind of source the job fetches ("rss", "google" or "newsapi").
+    lookback is the age in seconds past which the job drops entries, if it
+    has such a window; adaptive intervals are kept well inside it.
+    """
+
+    def __init__(self, key, url, func, *args, interval=None, origin=None, lookback=None):
+        self.key = key
+        self.url = url
+        self.func = func
+        self.args = args
+        self.interval = interval
+        self.origin = origin
+        self.lookback = lookback
+
+    @property
+    def host(self):
+        return urlparse(self.url or "").netloc.lower()
+
+    def __repr__(self):
+        return f"FetchJob({self.key!r}, {self.url!r})"
+
+
+def run_jobs(jobs, max_workers=None, per_host_limit=None, deadline=None):
+    """Run fetch jobs concurrently and return whatever finished before the deadline.
+
+    At most per_host_limit jobs run against the same host at once; the rest
+    wait in a per-host queue. Returns a (results, pending) tuple where results
+    maps job key to the job's return value and pending lists the keys that
+    failed or did not finish in time.
+    """
+    max_workers = max_workers or FETCH_MAX_WORKERS
+    per_host_limit = per_host_limit or FETCH_PER_HOST_LIMIT
+    deadline = FETCH_DEADLINE if deadline is None else deadline
+
+    queues = defaultdict(deque)
+    for job in jobs:
+        queues[job.host].append(job)
+
+    results = {}
+    pending = []
+    if not queues:
+        return results, pending
+
+    running = defaultdict(int)
+    in_flight = {}
+    started = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed-fetch")
+    stop_at = time.monotonic() + deadline
+
+    def submit_ready():
+        for host, queue in queues.items():
+            while queue and running[host] < per_host_limit:
+                job = queue.popleft()
+                running[host] += 1
+                future = executor.submit(job.func, *job.args)
+                in_flight[future] = job
+                started[future] = time.perf_counter()
+
+    try:
+        submit_ready()
+        while in_flight:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = in_flight.pop(future)
+                running[job.host] -= 1
+                metrics.FETCH_JOB_SECONDS.observe(time.perf_counter() - started.pop(future), origin=job.origin)
+                try:
+                    results[job.key] = future.result()
+                except Exception as e:
+                    logging.error(f"Fetch job {job.key} ({job.url}) failed: {e}")
+                    pending.append(job.key)
+            submit_ready()
+    finally:
+        # Do not wait for stragglers; their own request timeouts will reap them.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    timed_out_jobs = list(in_flight.values()) + [job for queue in queues.values() for job in queue]
+    for job in timed_out_jobs:
+        metrics.FETCH_JOB_TIMEOUTS.inc(origin=job.origin)
+    timed_out = [job.key for job in timed_out_jobs]
+    if timed_out:
+        logging.warning(f"Fetch deadline of {deadline}s reached; {len(timed_out)} feeds still pending: {timed_out}")
+    pending.extend(timed_out)
+    return results, pending
@@ -0,0 +1,136 @@
+"""Shared, connection-pooled HTTP session with retries and a per-host circuit breaker."""
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_COOLDOWN = int(os.getenv("BREAKER_COOLDOWN", "600"))
+USER_AGENT = "daily_report/1.0 (+https://github.com/5h33pd06/daily_report)"
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of making a request to a host whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Tracks consecutive failures per host and skips hosts that keep failing.
+
+    After threshold consecutive failures a host's circuit opens and requests
+    to it are refused for cooldown seconds. After that a single trial request
+    is let through (half-open); success closes the circuit again and failure
+    re-opens it for another cooldown.
+    """
+
+    def __init__(self, threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        """Return True if a request to host may be made now."""
+        with self._lock:
+            state = self._hosts.get(host)
+            if not state or state["opened_at"] is None:
+                return True
+            now = time.time()
+            if now - state["opened_at"] < self.cooldown:
+                return False
+            # Let one trial request through; give it a cooldown to report back
+            if state["trial_at"] and now - state["trial_at"] < self.cooldown:
+                return False
+            state["trial_at"] = now
+            return True
+
+    def record_success(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host, error):
+        with self._lock:
+            state = self._hosts.setdefault(host, {"failures": 0, "opened_at": None, "trial_at": None, "last_error": None})
+            state["failures"] += 1
+            state["last_error"] = str(error)
+            if state["failures"] >= self.threshold:
+                if state["opened_at"] is None:
+                    logging.warning(f"Circuit opened for {host} after {state['failures']} failures: {error}")
+                state["opened_at"] = time.time()
+                state["trial_at"] = None
+
+    def states(self):
+        """Return the breaker state of every host that has recently failed."""
+        now = time.time()
+        with self._lock:
+            states = []
+            for host, state in sorted(self._hosts.items()):
+                if state["opened_at"] is None:
+                    status, retry_in = "closed", 0
+                else:
+                    retry_in = max(0, int(self.cooldown - (now - state["opened_at"])))
+                    status = "open" if retry_in else "half-open"
+                states.append({
+                    "host": host,
+                    "state": status,
+                    "failures": state["failures"],
+                    "retry_in": retry_in,
+                    "last_error": state["last_error"],
+                })
+            return states
+
+
+def _build_session():
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+session = _build_session()
+breaker = CircuitBreaker()
+
+
+def get(url, timeout=None, **kwargs):
+    """GET url through the shared session, honouring the host's circuit breaker.
+
+    timeout defaults to (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT). Connection
+    errors, timeouts and 5xx or 429 responses count as failures for the
+    host. A 404 for one dead feed says nothing about the other feeds on the
+    host, so other responses reset it.
+    """
+    host = urlparse(url).netloc.lower()
+    if not breaker.allow(host):
+        raise CircuitOpenError(f"Circuit open for {host}; skipping {url}")
+    try:
+        response = session.get(url, timeout=timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), **kwargs)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        breaker.record_failure(host, e)
+        raise
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure(host, f"HTTP {response.status_code}")
+    else:
+        breaker.record_success(host)
+    return response
@@ -0,0 +1,180 @@
+"""Background ingestion of news feeds into a ready-to-serve article snapshot."""
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from article_index import ArticleIndex
+from atomic_file import atomic_write
+from dedup import dedupe_articles
+from feed_fetcher import run_jobs
+from poll_scheduler import PollScheduler
+from single_flight import SingleFlight
+
+INGEST_ENABLED = os.getenv("INGEST_ENABLED", "1") != "0"
+INGEST_TICK_SECONDS = int(os.getenv("INGEST_TICK_SECONDS", "30"))
+DEFAULT_POLL_INTERVAL = int(os.getenv("INGEST_INTERVAL", "900"))
+SNAPSHOT_WINDOW_SECONDS = int(os.getenv("SNAPSHOT_WINDOW_SECONDS", str(24 * 3600)))
+# fetch_log key, shared by every worker process using the same article store, bumped whenever articles are stored
+STORED_KEY = "ingest:stored"
+SNAPSHOT_FILE = os.getenv("SNAPSHOT_FILE", "snapshot.pickle")
+# A saved snapshot older than this is not served at start-up
+SNAPSHOT_MAX_STALENESS = int(os.getenv("SNAPSHOT_MAX_STALENESS", str(6 * 3600)))
+SNAPSHOT_FORMAT_VERSION = 2
+
+
+class Snapshot:
+    """An immutable, merged view of the articles from every source.
+
+    The articles are also indexed by source and topic when the snapshot is
+    built, on the ingestion thread, so requests never have to group them.
+    """
+
+    def __init__(self, articles, version, built_at):
+        self.articles = articles
+        self.version = version
+        self.built_at = built_at
+        self.index = ArticleIndex(articles)
+
+
+def save_snapshot(snapshot, path=SNAPSHOT_FILE):
+    """Write a snapshot to disk atomically as a versioned pickle."""
+    data = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "version": snapshot.version,
+        "built_at": snapshot.built_at,
+        "articles": snapshot.articles,
+    }
+    try:
+        atomic_write(path, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError as e:
+        logging.error(f"Error saving snapshot {path}: {e}")
+
+
+def load_snapshot(path=SNAPSHOT_FILE, max_staleness=SNAPSHOT_MAX_STALENESS):
+    """Return the snapshot saved at path, or None if it is missing, unreadable or too old.
+
+    The file is only ever written by save_snapshot, so it is trusted to unpickle.
+    """
+    try:
+        with open(path, 'rb') as file:
+            data = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.error(f"Error loading snapshot {path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("format") != SNAPSHOT_FORMAT_VERSION:
+        logging.info(f"Ignoring snapshot {path} saved in an older format")
+        return None
+    if datetime.utcnow() - data["built_at"] > timedelta(seconds=max_staleness):
+        logging.info(f"Ignoring snapshot {path} built at {data['built_at']}, older than {max_staleness}s")
+        return None
+    return Snapshot(data["articles"], data["version"], data["built_at"])
+
+
+class Ingestor:
+    """Polls each fetch job when the poll scheduler says it is due and publishes merged snapshots.
+
+    build_jobs is called on every tick and returns the FetchJobs that should
+    currently be polled, so topic and source edits are picked up without a
+    restart. Fetched articles are written to the article store and each
+    snapshot is a range query over its last 24 hours. Routes only ever read
+    the last published snapshot. Worker processes sharing the store also
+    share poll states, so each feed is fetched once per interval overall.
+    """
+
+    def __init__(self, build_jobs, store):
+        self._build_jobs = build_jobs
+        self._store = store
+        self._listeners = []
+        self._snapshot = Snapshot([], 0, None)
+        self._published_mark = None
+        self._run_lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._poller = PollScheduler(store, f"{store.path}.ingest.lock", DEFAULT_POLL_INTERVAL)
+        self._ready = threading.Event()
+
+    def snapshot(self):
+        """Return the most recently published snapshot."""
+        return self._snapshot
+
+    def warm_start(self, snapshot):
+        """Serve a previously saved snapshot until the first ingestion run publishes a new one."""
+        self._snapshot = snapshot
+        self._ready.set()
+        logging.info(f"Serving saved snapshot v{snapshot.version} with {len(snapshot.articles)} articles")
+
+    def add_listener(self, listener):
+        """Call listener(snapshot) every time a new snapshot is published."""
+        self._listeners.append(listener)
+
+    def wait_ready(self, timeout=None):
+        """Block until the first snapshot has been published."""
+        return self._ready.wait(timeout)
+
+    def poll_states(self):
+        """Return the current poll interval and publish-rate stats of every job, by job key."""
+        return self._poller.states()
+
+    def refresh(self):
+        """Run run_due() once on behalf of every caller that asks while it is running."""
+        return self._flight.do("run_due", self.run_due)
+
+    def run_due(self, force=False):
+        """Fetch every job whose poll interval has elapsed and publish a new snapshot."""
+        with self._run_lock:
+            jobs = self._build_jobs()
+            due = self._poller.claim_due(jobs, force)
+            if not due:
+                # Republish only when another worker has stored articles since our last snapshot
+                if self._ready.is_set() and self._store.last_fetched(STORED_KEY) == self._published_mark:
+                    return self._snapshot
+                return self._publish()
+
+            logging.info(f"Ingesting {len(due)} of {len(jobs)} feeds")
+            results, pending = run_jobs(due)
+
+            # Feeds that failed or missed the deadline keep their stored articles
+            by_origin = defaultdict(list)
+            for job in due:
+                by_origin[job.origin].extend(results.get(job.key, []))
+            for origin, articles in by_origin.items():
+                self._store.add_articles(articles, origin)
+            self._store.mark_fetched(STORED_KEY)
+            self._poller.record(due, results)
+            return self._publish()
+
+    def _publish(self):
+        # Read the mark before querying, so a store that lands in between triggers another publish
+        self._published_mark = self._store.last_fetched(STORED_KEY)
+        stored = self._store.recent(since=time.time() - SNAPSHOT_WINDOW_SECONDS)
+        articles = dedupe_articles(stored)
+        if len(articles) < len(stored):
+            logging.info(f"Dropped {len(stored) - len(articles)} duplicate articles")
+
+        self._snapshot = Snapshot(articles, self._snapshot.version + 1, datetime.utcnow())
+        self._ready.set()
+        logging.info(f"Published snapshot v{self._snapshot.version} with {len(articles)} articles")
+        for listener in self._listeners:
+            try:
+                listener(self._snapshot)
+            except Exception as e:
+                logging.error(f"Snapshot listener {listener!r} failed: {e}")
+        return self._snapshot
+
+    def start(self, scheduler):
+        """Schedule the ingestion loop on an APScheduler scheduler and start it."""
+        scheduler.add_job(
+            self.run_due,
+            "interval",
+            seconds=INGEST_TICK_SECONDS,
+            id="ingest_feeds",
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.start()
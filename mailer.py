@@ -0,0 +1,113 @@
+"""One authenticated SMTP connection reused across many messages, with pacing and retries."""
+import logging
+import os
+import smtplib
+import time
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+EMAIL_SEND_INTERVAL = float(os.getenv("EMAIL_SEND_INTERVAL", "1"))
+EMAIL_SEND_RETRIES = int(os.getenv("EMAIL_SEND_RETRIES", "2"))
+EMAIL_RETRY_BACKOFF = float(os.getenv("EMAIL_RETRY_BACKOFF", "5"))
+
+# Errors after which the connection is unusable and must be re-opened
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def _is_transient(error):
+    """Return True if sending again later might succeed."""
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    # 4xx replies are temporary failures (greylisting, rate limits); 5xx are permanent
+    code = getattr(error, "smtp_code", None)
+    return code is not None and 400 <= code < 500
+
+
+class Mailer:
+    """Sends messages over a single SMTP session that is opened on first use.
+
+    Messages are spaced at least interval seconds apart so a large fan-out
+    does not trip the provider's rate limits. A message that fails with a
+    dropped connection or a 4xx reply is retried with a fresh connection
+    after an increasing backoff; permanent failures are returned straight
+    away. A rejected login is raised as SMTPAuthenticationError instead, since
+    every later message would log in and fail the same way. Use as a context manager so the session is closed with QUIT.
+    """
+
+    def __init__(self, user=None, password=None, host=SMTP_HOST, port=SMTP_PORT, starttls=SMTP_STARTTLS,
+                 interval=EMAIL_SEND_INTERVAL, retries=EMAIL_SEND_RETRIES, backoff=EMAIL_RETRY_BACKOFF):
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.interval = interval
+        self.retries = retries
+        self.backoff = backoff
+        self._server = None
+        self._last_sent = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        logging.info(f"Opened SMTP session to {self.host}:{self.port}")
+        return server
+
+    def close(self):
+        """Close the SMTP session if one is open."""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+    def _wait_turn(self):
+        delay = self._last_sent + self.interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def send(self, msg):
+        """Send msg, returning None on success or the last error once retries run out.
+
+        Raises SMTPAuthenticationError if the server permanently rejects the login.
+        """
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * attempt)
+            self._wait_turn()
+            try:
+                if self._server is None:
+                    self._server = self._connect()
+                self._server.send_message(msg)
+                return None
+            except (smtplib.SMTPException, OSError) as e:
+                if isinstance(e, smtplib.SMTPAuthenticationError) and not _is_transient(e):
+                    raise
+                error = e
+                if isinstance(e, CONNECTION_ERRORS) and self._server is not None:
+                    self._server.close()
+                    self._server = None
+                if not _is_transient(e):
+                    break
+                logging.warning(f"Transient error sending to {msg['To']} (attempt {attempt + 1}): {e}")
+            finally:
+                self._last_sent = time.monotonic()
+        return error
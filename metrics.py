@@ -0,0 +1,168 @@
+"""Minimal in-process metrics registry rendered in the Prometheus text exposition format."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; suits anything from a cached parse to a slow feed hitting its read timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRIC_PREFIX = "daily_report_"
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = METRIC_PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self):
+        """Return the count summed over every label set."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """A value read from a callback each time metrics are rendered.
+
+    read() returns a number, or a dict mapping label-value tuples to numbers.
+    Pass kind="counter" when the callback reads a counter kept elsewhere.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, read, labels=(), kind="gauge"):
+        super().__init__(name, documentation, labels)
+        self._read = read
+        self.kind = kind
+
+    def render(self):
+        values = self._read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets and tracks their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the with-block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = self.header()
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render():
+    """Render every registered metric in the Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Feed instrumentation shared by the fetchers; "source" is the configured source name
+FEED_FETCH_SECONDS = Histogram("feed_fetch_seconds", "Time until a feed's response headers arrived.", ["source"])
+FEED_PARSE_SECONDS = Histogram("feed_parse_seconds", "Time spent downloading and parsing a feed body.", ["source"])
+FEED_BYTES = Counter("feed_bytes_total", "Bytes downloaded from the feed, before decompression.", ["source"])
+FEED_ITEMS = Counter("feed_items_total", "Articles kept from the feed.", ["source"])
+FEED_ERRORS = Counter("feed_errors_total", "Failed fetches or parses of the feed.", ["source"])
+FEED_NOT_MODIFIED = Counter("feed_not_modified_total", "304 Not Modified responses from the feed.", ["source"])
+FETCH_JOB_SECONDS = Histogram("fetch_job_seconds", "Wall-clock duration of ingestion fetch jobs.", ["origin"])
+FETCH_JOB_TIMEOUTS = Counter("fetch_job_timeouts_total", "Fetch jobs still running at the fetch deadline.", ["origin"])
@@ -0,0 +1,165 @@
+"""Adaptive per-feed poll intervals, driven by how often each feed publishes."""
+import heapq
+import os
+import time
+
+from single_flight import file_lock
+
+ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "1") != "0"
+POLL_MIN_INTERVAL = int(os.getenv("POLL_MIN_INTERVAL", "300"))
+# Keep below the RSS lookback window, or articles can age out between polls
+POLL_MAX_INTERVAL = int(os.getenv("POLL_MAX_INTERVAL", str(6 * 3600)))
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", "1.5"))
+# Weight of the latest poll in the moving averages of the item gap and the unchanged ratio
+POLL_SMOOTHING = 0.3
+# Poll this many times per expected new item, so a busy feed's items are picked up soon after they appear
+POLLS_PER_ITEM = 2
+# Poll at least this many times per lookback window, so entries are fetched before they age out of it
+POLLS_PER_LOOKBACK = 3
+
+
+def _clamp(interval, lookback=None):
+    longest = POLL_MAX_INTERVAL
+    if lookback:
+        longest = min(longest, lookback / POLLS_PER_LOOKBACK)
+    return min(longest, max(POLL_MIN_INTERVAL, interval))
+
+
+class PollState:
+    """What is known about one fetch job's feed: its interval, publish rate and when it is due.
+
+    gap is a moving average of the seconds between new items, unchanged a
+    moving average of the share of polls that found nothing new (a 304 from
+    the server or an unchanged feed), and newest_ts the publication time of
+    the newest item seen so far.
+    """
+
+    __slots__ = ("key", "interval", "next_due", "gap", "unchanged", "newest_ts", "polls")
+
+    def __init__(self, key, interval, next_due=0.0, gap=None, unchanged=0.0, newest_ts=None, polls=0):
+        self.key = key
+        self.interval = interval
+        self.next_due = next_due
+        self.gap = gap
+        self.unchanged = unchanged
+        self.newest_ts = newest_ts
+        self.polls = polls
+
+    def as_row(self):
+        return (self.key, self.interval, self.next_due, self.gap, self.unchanged, self.newest_ts, self.polls)
+
+    def observe(self, articles, fixed_interval, now, lookback=None):
+        """Fold a completed poll's articles into the state and schedule the next poll.
+
+        New items tighten the interval towards POLLS_PER_ITEM polls per
+        average gap between items; a poll with nothing new backs it off by
+        POLL_BACKOFF. The interval never exceeds a POLLS_PER_LOOKBACK share
+        of the job's lookback window. Jobs with a fixed_interval keep it but
+        are still tracked.
+        """
+        timestamps = sorted(a.pub_ts for a in articles if self.newest_ts is None or a.pub_ts > self.newest_ts)
+        self.polls += 1
+        if timestamps:
+            # On the first poll the spacing of the feed's own entries gives the publish rate
+            if self.newest_ts is None:
+                span, count = timestamps[-1] - timestamps[0], len(timestamps) - 1
+            else:
+                span, count = timestamps[-1] - self.newest_ts, len(timestamps)
+            if count and span > 0:
+                observed = span / count
+                self.gap = observed if self.gap is None else self.gap + POLL_SMOOTHING * (observed - self.gap)
+            self.newest_ts = timestamps[-1]
+            self.unchanged -= POLL_SMOOTHING * self.unchanged
+        else:
+            self.unchanged += POLL_SMOOTHING * (1 - self.unchanged)
+
+        if fixed_interval or not ADAPTIVE_POLLING:
+            self.interval = fixed_interval or self.interval
+        elif timestamps and self.gap:
+            self.interval = _clamp(self.gap / POLLS_PER_ITEM, lookback)
+        elif not timestamps:
+            self.interval = _clamp(self.interval * POLL_BACKOFF, lookback)
+        else:
+            self.interval = _clamp(self.interval, lookback)
+        self.next_due = now + self.interval
+
+
+class PollScheduler:
+    """Decides which fetch jobs are due and adapts each feed's interval to its publish rate.
+
+    Poll states are kept in the article store, so every worker process
+    sharing it sees the same intervals and due times, and jobs are claimed
+    under a lock file so each is fetched by one worker. Each worker also
+    keeps a heap of next-due times, so a tick with nothing due returns
+    without taking the lock or reading the store.
+    """
+
+    def __init__(self, store, lock_path, default_interval):
+        self._store = store
+        self._lock_path = lock_path
+        self._default_interval = default_interval
+        self._states = {}
+        self._heap = []
+
+    def _base_interval(self, job):
+        return job.interval or self._default_interval
+
+    def _reload(self, jobs):
+        """Re-read the shared states and rebuild the heap for the current jobs."""
+        self._states = {row["key"]: PollState(*row) for row in self._store.poll_states()}
+        self._heap = [(self._states[job.key].next_due, job.key) for job in jobs if job.key in self._states]
+        heapq.heapify(self._heap)
+
+    def claim_due(self, jobs, force=False):
+        """Return the jobs that are due now and lease them to this worker until their interval passes."""
+        now = time.time()
+        known = all(job.key in self._states for job in jobs)
+        if not force and known and not (self._heap and self._heap[0][0] <= now):
+            return []
+
+        with file_lock(self._lock_path):
+            self._reload(jobs)
+            due_keys = {job.key for job in jobs if force or job.key not in self._states}
+            while self._heap and self._heap[0][0] <= now:
+                due_keys.add(heapq.heappop(self._heap)[1])
+            due = [job for job in jobs if job.key in due_keys]
+
+            for job in due:
+                state = self._states.get(job.key)
+                if state is None:
+                    state = self._states[job.key] = PollState(job.key, self._base_interval(job))
+                # The lease stops other workers polling the job while this one fetches it
+                state.next_due = now + state.interval
+                heapq.heappush(self._heap, (state.next_due, job.key))
+            if due:
+                self._store.save_poll_states([self._states[job.key].as_row() for job in due])
+        return due
+
+    def record(self, jobs, results):
+        """Update the states of completed jobs from the articles they returned.
+
+        Jobs missing from results did not finish before the deadline and keep
+        their lease as the next due time.
+        """
+        now = time.time()
+        finished = [job for job in jobs if job.key in results]
+        for job in finished:
+            state = self._states[job.key]
+            state.observe(results[job.key], job.interval, now, job.lookback)
+            heapq.heappush(self._heap, (state.next_due, job.key))
+        if finished:
+            self._store.save_poll_states([self._states[job.key].as_row() for job in finished])
+
+    def states(self):
+        """Return the shared poll state of every job, as dicts keyed by job key, for display."""
+        now = time.time()
+        return {
+            row["key"]: {
+                "interval": int(row["interval"]),
+                "next_in": max(0, int(row["next_due"] - now)),
+                "gap": int(row["gap"]) if row["gap"] is not None else None,
+                "unchanged": round(row["unchanged"] * 100),
+                "polls": row["polls"],
+            }
+            for row in self._store.poll_states()
+        }
@@ -0,0 +1,53 @@
+"""Opt-in cProfile hook that also follows work handed off to new threads."""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+PROFILE_MAX_LINES = 200
+
+_profile_lock = threading.Lock()
+
+
+def profile_call(func, sort="cumulative", lines=40):
+    """Run func() under cProfile and return (result, report).
+
+    Ingestion does its work in a fetch thread pool. From Python 3.12
+    cProfile is built on sys.monitoring and one profiler already sees every
+    thread; a second one cannot be enabled alongside it. On older versions
+    cProfile only sees the thread it runs in, so threads started while func
+    runs get a profiler of their own, merged into the report afterwards.
+    Only one profile can run at a time.
+    """
+    thread_profiles = []
+
+    def start_thread_profile(frame, event, arg):
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        thread_profiles.append(profile)
+        profile.enable()
+
+    per_thread = sys.version_info < (3, 12)
+    with _profile_lock:
+        main_profile = cProfile.Profile()
+        if per_thread:
+            threading.setprofile(start_thread_profile)
+        main_profile.enable()
+        try:
+            result = func()
+        finally:
+            main_profile.disable()
+            if per_thread:
+                threading.setprofile(None)
+
+    stream = io.StringIO()
+    stats = pstats.Stats(main_profile, stream=stream)
+    for profile in thread_profiles:
+        profile.disable()
+        stats.add(profile)
+    stats.sort_stats(sort).print_stats(lines)
+    return result, stream.getvalue()
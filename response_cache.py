@@ -0,0 +1,92 @@
+"""Cache of rendered responses keyed on the article snapshot and config versions."""
+import gzip
+import hashlib
+import threading
+
+from flask import make_response, request
+
+GZIP_MIN_SIZE = 1024
+
+
+class CachedBody:
+    """A pre-rendered response body with its gzip encoding and strong ETag."""
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None
+
+
+class ResponseCache:
+    """Holds one rendered body per route for the current cache key.
+
+    The key combines the snapshot version with anything else the page
+    depends on (such as the config file versions). When the key changes,
+    every cached body is dropped and re-rendered on the next request.
+    hits and misses count lookups answered from the cache and renders.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Drop every cached body."""
+        with self._lock:
+            self._key = None
+            self._bodies = {}
+
+    def get(self, name, key, render, mimetype):
+        """Return the cached body for name, calling render() to build it on a miss."""
+        with self._lock:
+            if key != self._key:
+                self._key = key
+                self._bodies = {}
+            cached = self._bodies.get(name)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if cached is None:
+            rendered = render()
+            if isinstance(rendered, str):
+                rendered = rendered.encode("utf-8")
+            cached = CachedBody(rendered, mimetype)
+            with self._lock:
+                if key == self._key:
+                    self._bodies[name] = cached
+        return cached
+
+    def stats(self):
+        """Return hit/miss counters for the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._bodies),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def respond(self, name, key, render, mimetype):
+        """Build a response for the cached body, answering 304 when the client's ETag matches."""
+        cached = self.get(name, key, render, mimetype)
+        use_gzip = cached.gzipped is not None and "gzip" in request.accept_encodings
+        # Each encoding is a different representation, so it gets its own strong ETag
+        etag = f"{cached.etag}-gz" if use_gzip else cached.etag
+        if request.if_none_match.contains(cached.etag) or request.if_none_match.contains(f"{cached.etag}-gz"):
+            response = make_response("", 304)
+        elif use_gzip:
+            response = make_response(cached.gzipped)
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = make_response(cached.body)
+        response.mimetype = cached.mimetype
+        response.set_etag(etag)
+        response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = "no-cache"
+        return response
@@ -0,0 +1,70 @@
+"""Persisted record of which articles have already been emailed."""
+import json
+import logging
+import os
+import time
+
+from atomic_file import atomic_write
+from dedup import canonicalize_url
+
+SENT_LEDGER_FILE = os.getenv("SENT_LEDGER_FILE", "sent_ledger.json")
+SENT_LEDGER_RETENTION_DAYS = int(os.getenv("SENT_LEDGER_RETENTION_DAYS", "14"))
+LEDGER_FORMAT_VERSION = 2
+
+
+def article_key(article):
+    """Return the ledger key for an article: its canonical URL."""
+    return canonicalize_url(article.link)
+
+
+class SentLedger:
+    """Remembers, per recipient, the canonical URL of every article sent and when the last run was.
+
+    Entries older than the retention period are dropped on save; by then the
+    articles have aged out of the briefing window anyway.
+    """
+
+    def __init__(self, path=SENT_LEDGER_FILE, retention_days=SENT_LEDGER_RETENTION_DAYS):
+        self.path = path
+        self.retention = retention_days * 86400
+        self.sent = {}
+        self.last_run = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+            if data.get("version") == LEDGER_FORMAT_VERSION:
+                self.sent = data.get("sent", {})
+                self.last_run = data.get("last_run")
+        except (OSError, ValueError, AttributeError) as e:
+            logging.error(f"Error loading sent ledger {self.path}: {e}")
+
+    def unsent(self, articles, recipient=""):
+        """Return the articles that have not been sent to recipient before, in order."""
+        sent = self.sent.get(recipient, {})
+        return [article for article in articles if article_key(article) not in sent]
+
+    def mark_sent(self, articles, recipient=""):
+        """Record articles as sent to recipient and stamp the time of this run."""
+        now = time.time()
+        sent = self.sent.setdefault(recipient, {})
+        for article in articles:
+            sent[article_key(article)] = now
+        self.last_run = now
+
+    def save(self):
+        """Prune expired entries and write the ledger to disk atomically."""
+        cutoff = time.time() - self.retention
+        self.sent = {
+            recipient: {key: sent_at for key, sent_at in sent.items() if sent_at >= cutoff}
+            for recipient, sent in self.sent.items()
+        }
+        data = {"version": LEDGER_FORMAT_VERSION, "last_run": self.last_run, "sent": self.sent}
+        try:
+            atomic_write(self.path, json.dumps(data))
+        except OSError as e:
+            logging.error(f"Error saving sent ledger {self.path}: {e}")
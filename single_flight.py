@@ -0,0 +1,82 @@
+"""Coalescing of duplicate work, within a process and across worker processes."""
+import errno
+import fcntl
+import threading
+import time
+from contextlib import contextmanager
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its outcome.
+
+    The first caller for a key runs the function. Callers that arrive while
+    it is running wait for it and get the same return value, or the same
+    exception. Under gevent's monkey patching the threading primitives used
+    here become cooperative, so waiting callers yield to other greenlets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Return func(), sharing one execution among concurrent callers for key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+@contextmanager
+def file_lock(path, timeout=None):
+    """Hold an exclusive lock on path across processes; yields False if timeout expires first.
+
+    flock is taken non-blocking and retried after a short sleep. A blocking
+    flock would stall every greenlet in a gevent worker, while the sleep is
+    patched into a cooperative yield. Separate opens of the same file also
+    exclude each other between threads of one process.
+    """
+    stop_at = None if timeout is None else time.monotonic() + timeout
+    with open(path, 'a') as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+            if stop_at is not None and time.monotonic() >= stop_at:
+                yield False
+                return
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,114 @@
+"""Single-pass topic classification using an Aho-Corasick automaton."""
+import functools
+from collections import deque
+
+DEFAULT_TOPIC = "General"
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def _ends_word(text, end):
+    """True if a match ending just before end is a whole word, allowing plural "s"/"es"."""
+    for suffix in ("", "s", "es"):
+        boundary = end + len(suffix)
+        if text.startswith(suffix, end) and (boundary >= len(text) or not _is_word_char(text[boundary])):
+            return True
+    return False
+
+
+class TopicMatcher:
+    """Finds every configured topic in a piece of text in one pass.
+
+    Topics are matched case-insensitively on word boundaries, so "ai" does
+    not match inside "email"; a plural "s"/"es" suffix is still allowed, so
+    "data breach" matches "data breaches". When several topics match, they
+    are reported in the order they appear in topics.json, which keeps the
+    behaviour of the old first-match scan.
+    """
+
+    def __init__(self, topics):
+        self.topics = tuple(topics)
+        self._goto = [{}]
+        self._fail = [0]
+        # Each output is (topic index, pattern length)
+        self._outputs = [[]]
+        for index, topic in enumerate(self.topics):
+            pattern = topic.strip().lower()
+            if pattern:
+                self._add(pattern, index)
+        self._build_failure_links()
+
+    def _add(self, pattern, index):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((index, len(pattern)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def _matched_indexes(self, text):
+        text = text.lower()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index, pattern_length in outputs[state]:
+                if index in found:
+                    continue
+                start = position - pattern_length + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not _ends_word(text, position + 1):
+                    continue
+                found.add(index)
+        return sorted(found)
+
+    def match_all(self, text):
+        """Return every topic found in text, in topics.json order."""
+        if not text:
+            return []
+        return [self.topics[index] for index in self._matched_indexes(text)]
+
+    def classify(self, text):
+        """Return the first matching topic, or "General" if none match."""
+        matches = self.match_all(text)
+        return matches[0] if matches else DEFAULT_TOPIC
+
+
+# Google News batches each classify against their own subset of the topics,
+# so keep a matcher per topic list rather than one that they keep replacing
+MATCHER_CACHE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _build_matcher(topics):
+    return TopicMatcher(topics)
+
+
+def get_matcher(topics):
+    """Return a matcher for topics, building each distinct topic list's automaton once."""
+    return _build_matcher(tuple(topics))